@@ -1,8 +1,17 @@
 import streamlit as st    
-from pathlib import Path    
-from crew import *    
-from video_processing import *    
+import streamlit.components.v1 as components  
+from pipeline import generate_story_video    
+from job_queue import JobQueue    
+from media_store import MediaStore, start_media_server, MEDIA_BASE_URL    
 import os    
+import time    
+import logging    
+import json    
+  
+POLL_INTERVAL_SECONDS = 1.0    
+  
+# Pipeline modules log through `logging`; DEBUG output is skipped cheaply unless enabled    
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(name)s %(levelname)s %(message)s")    
   
 # 🌐 Page Configuration    
 st.set_page_config(    
@@ -12,6 +21,56 @@ st.set_page_config(
     initial_sidebar_state="collapsed"    
 )    
   
+  
+@st.cache_resource(show_spinner=False)    
+def get_job_queue() -> JobQueue:    
+    # One worker pool per server process, shared by every session    
+    return JobQueue(generate_story_video, max_workers=int(os.getenv("JOB_WORKERS", 2)))    
+  
+  
+@st.cache_resource(show_spinner=False)    
+def get_media_store() -> MediaStore:    
+    # Sessions only keep a handle; with MEDIA_BASE_URL set, videos are streamed from disk with range support    
+    store = MediaStore()    
+    if MEDIA_BASE_URL:  
+        start_media_server(store)  
+    return store    
+  
+  
+job_queue = get_job_queue()    
+media_store = get_media_store()    
+  
+  
+def show_video(handle: str, subtitles: str = None) -> None:  
+    """Play a stored video from the media server when it is configured, otherwise through Streamlit."""  
+    if MEDIA_BASE_URL:  
+        st.video(media_store.url(handle), subtitles=subtitles)  
+        return  
+    found = media_store.lookup(handle)  
+    if found:  
+        st.video(found[0], subtitles=subtitles)  
+  
+  
+def hls_player(playlist_url: str, subtitles_url: str = None) -> str:  
+    """HTML for a video element playing a (possibly still growing) HLS playlist from its start."""  
+    track = f'<track kind="subtitles" src="{subtitles_url}" label="Subtitles" default>' if subtitles_url else ""  
+    return f"""  
+    <video id="player" controls playsinline crossorigin="anonymous" style="width:100%">{track}</video>  
+    <script src="https://cdn.jsdelivr.net/npm/hls.js@1"></script>  
+    <script>  
+      const video = document.getElementById("player");  
+      const source = {json.dumps(playlist_url)};  
+      if (video.canPlayType("application/vnd.apple.mpegurl")) {{  
+        video.src = source;  
+      }} else if (window.Hls && Hls.isSupported()) {{  
+        // EVENT playlists would otherwise start at the live edge  
+        const hls = new Hls({{startPosition: 0}});  
+        hls.loadSource(source);  
+        hls.attachMedia(video);  
+      }}  
+    </script>  
+    """  
+  
 # Custom CSS for styling    
 st.markdown("""    
     <style>    
@@ -84,71 +143,155 @@ with st.container():
         # Style Selection    
         st.markdown('<p class="section-header">Choose Visualization Style</p>', unsafe_allow_html=True)    
         style_cols = st.columns(2)    
+        if "visual_style" not in st.session_state:    
+            st.session_state.visual_style = "Realistic"    
         with style_cols[0]:    
-            st.button("🎨 Comic Style", use_container_width=True)    
+            if st.button("🎨 Comic Style", use_container_width=True):    
+                st.session_state.visual_style = "Comic"    
         with style_cols[1]:    
-            st.button("🎭 Realistic Style", use_container_width=True)    
+            if st.button("🎭 Realistic Style", use_container_width=True):    
+                st.session_state.visual_style = "Realistic"    
+        st.caption(f"Selected style: {st.session_state.visual_style}")    
+  
+        # Bypass the result cache when a fresh video is wanted    
+        force_regenerate = st.checkbox("Force regenerate", value=False)    
+        show_timings = st.checkbox("Show timing panel", value=False)    
   
         # 🚀 Generate Button    
         try:    
+            # Re-attach to a running job after a browser refresh    
+            if "job_id" not in st.session_state and "job" in st.query_params:    
+                st.session_state.job_id = st.query_params["job"]    
+  
             if st.button("✨ Generate Story", type="primary", use_container_width=True):    
                 if historical_figure and language:    
-                    with st.spinner("Generating video... Please wait"):    
-                        result = crew.kickoff(inputs={"topic": historical_figure, "language": language})    
-  
-                        if len(result.tasks_output) >= 3:    
-                            subtitle_text = result.tasks_output[1].raw    
-  
-                            st.markdown("#### 🎬 Generated Video")     
-                            # Video processing    
-                            start_path = Path.cwd()    
-                            video_path_raw = result.tasks_output[3].raw.replace('\n', '').replace('```', '').strip().strip('"\'`')    
-                            video_path = Path(video_path_raw)     
-  
-                            # Clean subtitles    
-                            subtitle_text = clean_subtitle_text(subtitle_text)    
-  
-                            # Process audio path    
-                            audio_file_raw = result.tasks_output[2].raw.replace('\n', '').replace('```', '').strip().strip('"\'`')    
-                            audio_file_path = Path(audio_file_raw)     
-                            audio_clip = AudioFileClip(audio_file_path)    
-                            duration = audio_clip.duration    
-                            audio_clip.close()    
-  
-                            # Generate subtitles file    
-                            vtt_content = generate_vtt(subtitle_text, duration)    
-                            with open("subtitles.vtt", "w", encoding="utf-8") as f:    
-                                f.write(vtt_content)    
-                            subtitles_path = os.path.abspath("subtitles.vtt")    
-  
-                            # Combine audio + video    
-                            video_path_raw = combine_audio_video(video_path, audio_file_path)    
-                            video_path = Path(video_path_raw)    
-  
-                            relative_path = video_path.relative_to(start_path)    
-                            clean_path = Path(str(relative_path).strip())    
-  
-                            video_file = open(clean_path, "rb")    
-                            video_bytes = video_file.read()    
-                              
-                            # Store video data in session state for persistence  
-                            st.session_state.video_bytes = video_bytes  
-                            st.session_state.video_filename = f"{historical_figure.replace(' ', '_')}_story.mp4"  
-                              
-                            st.video(video_bytes, subtitles=subtitles_path)    
-                            video_file.close()    
-  
-            # Display download button if video exists in session state  
-            if "video_bytes" in st.session_state:  
-                st.download_button(  
-                    label="📥 Download Video",  
-                    data=st.session_state.video_bytes,  
-                    file_name=st.session_state.video_filename,  
-                    mime="video/mp4",  
-                    on_click="ignore",  
-                    type="secondary",  
-                    use_container_width=True  
-                )  
+                    # Generation runs on the shared worker pool; this script only polls the job    
+                    st.session_state.job_id = job_queue.submit(    
+                        topic=historical_figure,    
+                        language=language,    
+                        style=st.session_state.visual_style,    
+                        force_regenerate=force_regenerate,    
+                        # Live segments need the media server; without it the draft preview is shown    
+                        stream_segments=None if MEDIA_BASE_URL else False    
+                    )    
+                    st.session_state.video_filename = f"{historical_figure.replace(' ', '_')}_story.mp4"  
+                    st.query_params["job"] = st.session_state.job_id    
+  
+            job_id = st.session_state.get("job_id")    
+            job = job_queue.get(job_id) if job_id else None    
+            if job_id and job is None:    
+                # Unknown or expired job ID    
+                st.session_state.pop("job_id", None)    
+                st.query_params.clear()    
+  
+            if job and job["status"] in ("queued", "running"):    
+                stage = "Waiting for a free worker" if job["status"] == "queued" else f"Working on: {job['stage'].replace('_', ' ')}"    
+                st.progress(job["progress"], text=stage)    
+  
+                # Scenes stream as HLS segments while later images are still being generated  
+                stream = job["artifacts"].get("stream")  
+                # Low-resolution draft while the full-quality video is still rendering  
+                preview = job["artifacts"].get("preview")  
+                if stream:  
+                    if st.session_state.get("stream_job") != job_id:  
+                        st.session_state.stream_job = job_id  
+                        # The playlist grows in place, so the directory is served rather than copied  
+                        st.session_state.stream_handle = media_store.add_directory(  
+                            os.path.dirname(stream["playlist_path"]), os.path.basename(stream["playlist_path"]))  
+                        st.session_state.stream_subtitles = (  
+                            media_store.add(stream["subtitles_path"]) if os.path.exists(stream["subtitles_path"]) else None)  
+                    st.markdown("#### 🎬 Watch while it renders")  
+                    st.caption("Scenes are added as they are generated; the full video replaces this when ready")  
+                    subtitles_handle = st.session_state.stream_subtitles  
+                    components.html(  
+                        hls_player(media_store.url(st.session_state.stream_handle),  
+                                   media_store.url(subtitles_handle) if subtitles_handle else None),  
+                        height=420  
+                    )  
+                elif preview:  
+                    if st.session_state.get("preview_job") != job_id:  
+                        st.session_state.preview_job = job_id  
+                        st.session_state.preview_handle = media_store.add(preview["video_path"])  
+                    st.markdown("#### 🎬 Preview")  
+                    st.caption("Draft at reduced quality; the full video replaces it when ready")  
+                    # The run's workspace (and its subtitles) is removed once the final video is stored  
+                    subtitles = preview["subtitles_path"] if os.path.exists(preview["subtitles_path"]) else None  
+                    show_video(st.session_state.preview_handle, subtitles=subtitles)  
+                if st.button("✖ Cancel", use_container_width=True):    
+                    job_queue.cancel(job_id)    
+                time.sleep(POLL_INTERVAL_SECONDS)    
+                st.rerun()    
+  
+            elif job:    
+                st.session_state.pop("job_id", None)    
+                st.session_state.pop("preview_job", None)  
+                st.session_state.pop("preview_handle", None)  
+                st.session_state.pop("stream_job", None)  
+                st.session_state.pop("stream_handle", None)  
+                st.session_state.pop("stream_subtitles", None)  
+                st.query_params.clear()    
+  
+                if job["status"] == "done":    
+                    result = job["result"]    
+                    st.markdown("#### 🎬 Generated Video")     
+                    if result.cached:    
+                        st.caption("Served from cache")    
+  
+                    # Keep only a handle in session state; the player fetches ranges from the media server  
+                    st.session_state.setdefault("video_filename", f"{job['params']['topic'].replace(' ', '_')}_story.mp4")  
+                    st.session_state.video_handle = media_store.add(result.video_path, st.session_state.video_filename)  
+                      
+                    show_video(st.session_state.video_handle, subtitles=result.subtitles_path)    
+  
+                    if show_timings and result.trace:    
+                        with st.expander("⏱️ Timings", expanded=True):    
+                            st.dataframe(    
+                                [    
+                                    {    
+                                        "span": span["name"],    
+                                        "start (s)": round(span["start"], 2),    
+                                        "duration (s)": round(span["duration"], 2),    
+                                        "attributes": ", ".join(f"{k}={v}" for k, v in span["attributes"].items()),    
+                                    }    
+                                    for span in result.trace["spans"]    
+                                ],    
+                                use_container_width=True    
+                            )    
+                            st.download_button(    
+                                label="Download trace (JSON)",    
+                                data=json.dumps(result.trace, indent=2, default=str),    
+                                file_name=f"trace_{result.trace['trace_id']}.json",    
+                                mime="application/json",    
+                                on_click="ignore"    
+                            )    
+                elif job["status"] == "cancelled":    
+                    st.warning("Generation cancelled.")    
+                else:    
+                    st.error(f"An error occurred: {job['error']}")    
+  
+            # Display download link while the session's video handle is live  
+            if "video_handle" in st.session_state:  
+                found = media_store.lookup(st.session_state.video_handle)  
+                if found and MEDIA_BASE_URL:  
+                    st.link_button(  
+                        label="📥 Download Video",  
+                        url=media_store.url(st.session_state.video_handle, download=True),  
+                        type="secondary",  
+                        use_container_width=True  
+                    )  
+                elif found:  
+                    path, filename, mime = found  
+                    with open(path, "rb") as video_file:  
+                        st.download_button(  
+                            label="📥 Download Video",  
+                            data=video_file,  
+                            file_name=filename,  
+                            mime=mime,  
+                            use_container_width=True,  
+                            on_click="ignore"  
+                        )  
+                else:  
+                    st.session_state.pop("video_handle")  
   
         except Exception as e:    
             st.error(f"An error occurred: {str(e)}")
@@ -0,0 +1,78 @@
+import os
+import json
+import wave
+import logging
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = ".json"
+
+
+def manifest_path(audio_path: str) -> str:
+    """Sidecar manifest path for an audio file (narration.wav -> narration.wav.json)."""
+    return str(audio_path) + MANIFEST_SUFFIX
+
+
+def write_audio_manifest(audio_path: str, sample_rate: int, channels: int, sample_width: int,
+                         chunks: List[Dict[str, Any]]) -> str:
+    """
+    Write the metadata sidecar for a narration file.
+
+    Args:
+        audio_path: Path of the narration WAV
+        sample_rate: Samples per second
+        channels: Number of channels
+        sample_width: Bytes per sample
+        chunks: One {"text", "start", "duration"} entry per synthesized chunk, in order
+
+    Returns:
+        str: Path of the manifest
+    """
+    manifest = {
+        "audio_path": os.path.abspath(audio_path),
+        "total_duration": sum(chunk["duration"] for chunk in chunks),
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "sample_width": sample_width,
+        "chunks": chunks,
+    }
+    path = manifest_path(audio_path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def read_audio_manifest(audio_path: str) -> Optional[Dict[str, Any]]:
+    """Load the sidecar manifest for an audio file, or None if there is none."""
+    try:
+        with open(manifest_path(audio_path), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def audio_duration(audio_path: str) -> float:
+    """
+    Duration of a narration file in seconds without decoding it.
+
+    Uses the manifest when present, then the WAV header, and only falls back to
+    an ffmpeg probe for files that are neither.
+    """
+    manifest = read_audio_manifest(audio_path)
+    if manifest:
+        return manifest["total_duration"]
+
+    try:
+        with wave.open(str(audio_path), "rb") as wav:
+            return wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError):
+        pass
+
+    logger.debug("No manifest or WAV header for %s, probing with ffmpeg", audio_path)
+    from moviepy import AudioFileClip
+    audio_clip = AudioFileClip(str(audio_path))
+    try:
+        return audio_clip.duration
+    finally:
+        audio_clip.close()
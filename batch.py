@@ -0,0 +1,188 @@
+"""
+Headless batch generation of story videos.
+
+Usage:
+    python batch.py figures.jsonl --workers 4 --manifest batch_manifest.jsonl --output-dir videos
+
+Each input line is a JSON object with "topic" and "language" (and optionally
+"style"). Jobs run generate_story_video in a pool of worker processes, so
+research, narration, images and the encode of different figures proceed in
+parallel. Each finished video (and its subtitles) is copied into --output-dir,
+out of reach of the result cache's eviction, and appended to the manifest as
+soon as it completes; rerunning the same command skips jobs already recorded
+as done whose files are still there.
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set
+
+from result_cache import ResultCache
+
+logger = logging.getLogger(__name__)
+
+
+def job_key(job: Dict[str, str]) -> str:
+    """Stable identity of a job, matching how the result cache normalizes requests."""
+    return ResultCache.make_key(job["topic"], job["language"], job.get("style") or "", "batch")
+
+
+def read_jobs(path: str, default_style: Optional[str] = None) -> List[Dict[str, str]]:
+    """Load {topic, language[, style]} jobs, skipping malformed lines and duplicates."""
+    jobs, seen = [], set()
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                logger.warning("%s:%d: invalid JSON (%s), skipped", path, line_number, e)
+                continue
+            if not isinstance(record, dict) or not record.get("topic") or not record.get("language"):
+                logger.warning("%s:%d: needs 'topic' and 'language', skipped", path, line_number)
+                continue
+            job = {"topic": record["topic"], "language": record["language"],
+                   "style": record.get("style") or default_style}
+            key = job_key(job)
+            if key not in seen:
+                seen.add(key)
+                jobs.append(job)
+    return jobs
+
+
+def output_name(job: Dict[str, str]) -> str:
+    """File name stem of a job's deliverables: readable topic/language plus the unique job key."""
+    label = re.sub(r"[^\w-]+", "_", f"{job['topic']}_{job['language']}").strip("_")[:60]
+    return f"{label}_{job_key(job)[:12]}"
+
+
+def copy_deliverable(path: str, output_dir: str, name: str) -> str:
+    """Atomically copy a file into output_dir under the given name, returning the new absolute path."""
+    destination = os.path.abspath(os.path.join(output_dir, name))
+    shutil.copyfile(path, destination + ".part")
+    os.replace(destination + ".part", destination)
+    return destination
+
+
+def read_finished(manifest_path: str) -> Set[str]:
+    """Keys of jobs the manifest records as done and whose video still exists."""
+    finished = set()
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; the job simply runs again
+                    continue
+                if entry.get("status") == "done" and os.path.exists(entry.get("video_path") or ""):
+                    finished.add(entry["key"])
+    except FileNotFoundError:
+        pass
+    return finished
+
+
+def run_job(job: Dict[str, str], output_dir: str, force_regenerate: bool = False) -> Dict[str, object]:
+    """Worker entry point: generate one video, copy it into output_dir and describe the outcome."""
+    # Imported in the worker so each process builds its own clients and crew
+    from pipeline import generate_story_video
+
+    start = time.perf_counter()
+    entry = {"key": job_key(job), **job}
+    try:
+        result = generate_story_video(job["topic"], job["language"], style=job.get("style"),
+                                      force_regenerate=force_regenerate)
+        # result.video_path lives in the result cache, which evicts by age and size
+        name = output_name(job)
+        video_path = copy_deliverable(result.video_path, output_dir, name + ".mp4")
+        subtitles_path = None
+        if result.subtitles_path and os.path.exists(result.subtitles_path):
+            subtitles_path = copy_deliverable(result.subtitles_path, output_dir, name + ".vtt")
+        entry.update(status="done", video_path=video_path, subtitles_path=subtitles_path,
+                     cached=result.cached, stage_timings=result.stage_timings)
+    except Exception as e:
+        entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+    entry["seconds"] = time.perf_counter() - start
+    entry["finished_at"] = time.time()
+    return entry
+
+
+def run_batch(jobs: List[Dict[str, str]], manifest_path: str, workers: int, output_dir: str,
+              force_regenerate: bool = False) -> Dict[str, float]:
+    """
+    Run the jobs not yet finished according to the manifest.
+
+    Returns:
+        dict: Counts of done/failed/skipped jobs, elapsed seconds and videos per hour
+    """
+    finished = read_finished(manifest_path)
+    pending = [job for job in jobs if job_key(job) not in finished]
+    logger.info("%d jobs, %d already done, %d to run on %d workers",
+                len(jobs), len(jobs) - len(pending), len(pending), workers)
+
+    os.makedirs(output_dir, exist_ok=True)
+    done = failed = 0
+    start = time.perf_counter()
+    with open(manifest_path, "a", encoding="utf-8") as manifest, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_job, job, output_dir, force_regenerate): job for job in pending}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. killed for memory)
+                entry = {"key": job_key(job), **job, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+            manifest.write(json.dumps(entry, default=str) + "\n")
+            manifest.flush()
+            if entry["status"] == "done":
+                done += 1
+                logger.info("done   %s (%s) in %.1fs", job["topic"], job["language"], entry.get("seconds", 0.0))
+            else:
+                failed += 1
+                logger.error("failed %s (%s): %s", job["topic"], job["language"], entry.get("error"))
+
+    elapsed = time.perf_counter() - start
+    return {
+        "done": done,
+        "failed": failed,
+        "skipped": len(jobs) - len(pending),
+        "elapsed_seconds": elapsed,
+        "videos_per_hour": done / elapsed * 3600 if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jobs", help="JSONL file of {topic, language[, style]} jobs")
+    parser.add_argument("--manifest", default="batch_manifest.jsonl", help="Results manifest (appended to, used to resume)")
+    parser.add_argument("--output-dir", default="batch_output", help="Directory finished videos are copied into")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BATCH_WORKERS", 2)),
+                        help="Worker processes running jobs concurrently")
+    parser.add_argument("--style", default=None, help="Visual style for jobs that do not set one")
+    parser.add_argument("--force-regenerate", action="store_true", help="Bypass the result cache")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    jobs = read_jobs(args.jobs, default_style=args.style)
+    if not jobs:
+        logger.error("No valid jobs in %s", args.jobs)
+        sys.exit(1)
+
+    summary = run_batch(jobs, args.manifest, max(1, args.workers), args.output_dir,
+                        force_regenerate=args.force_regenerate)
+    print(f"{summary['done']} done, {summary['failed']} failed, {summary['skipped']} skipped "
+          f"in {summary['elapsed_seconds']:.1f}s ({summary['videos_per_hour']:.1f} videos/hour)")
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Measure the pan/zoom + crossfade compositor against its frames-per-second-per-core budget.
+
+Usage:
+    python benchmarks/bench_motion.py --scenes 12 --scene-seconds 5 --output motion_bench.json
+    python benchmarks/bench_motion.py --encode
+
+Synthetic 1280x720 scenes are composited exactly as motion.render_motion does,
+but the frames are discarded instead of encoded, so the figure is the
+compositor alone: frames produced per CPU-second of this process
+(single-threaded NumPy, so one core). The run fails (exit status 1) when that
+falls below motion.FPS_PER_CORE_BUDGET. With --encode the same scenes are also
+rendered end to end through ffmpeg and the wall time is reported.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_pipeline import IMAGE_SIZE  # noqa: E402
+from motion import (  # noqa: E402
+    FPS_PER_CORE_BUDGET, MOTION_FPS, CROSSFADE_SECONDS, MotionPlan, iter_motion_frames, render_motion,
+)
+
+
+def make_frames(count: int) -> list:
+    """Distinct noisy gradients as packed rgb24 frames, like frame_pipeline.iter_frames yields."""
+    width, height = IMAGE_SIZE
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    frames = []
+    for _ in range(count):
+        tint = rng.uniform(0.3, 1.0, size=3).astype(np.float32)
+        noise = rng.normal(0, 12, size=(height, width, 3)).astype(np.float32)
+        frames.append(np.clip(gradient * tint + noise, 0, 255).astype(np.uint8).tobytes())
+    return frames
+
+
+def bench_composite(frames: list, scene_seconds: float, fps: int, crossfade: float) -> dict:
+    durations = [scene_seconds] * len(frames)
+    plan_start = time.process_time()
+    plan = MotionPlan(durations, IMAGE_SIZE, fps=fps, crossfade=crossfade)
+    plan_seconds = time.process_time() - plan_start
+
+    produced = 0
+    frame_bytes = IMAGE_SIZE[0] * IMAGE_SIZE[1] * 4
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for batch in iter_motion_frames(plan, iter(frames), IMAGE_SIZE):
+        produced += len(batch) // frame_bytes
+    wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+    return {
+        "frames": produced,
+        "crossfade_frames": plan.crossfade_frames,
+        "plan_seconds": plan_seconds,
+        "composite_wall_seconds": wall,
+        "composite_cpu_seconds": cpu,
+        "fps_per_core": produced / cpu if cpu else float("inf"),
+        "budget_fps_per_core": FPS_PER_CORE_BUDGET,
+    }
+
+
+def bench_encode(frames: list, scene_seconds: float, fps: int, crossfade: float) -> dict:
+    width, height = IMAGE_SIZE
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i, frame in enumerate(frames):
+            path = os.path.join(tmp_dir, f"scene_{i:03d}.png")
+            Image.frombytes("RGB", IMAGE_SIZE, frame).save(path, compress_level=1)
+            paths.append(path)
+        start = time.perf_counter()
+        video_path = render_motion(paths, [scene_seconds] * len(paths), os.path.join(tmp_dir, "motion.mp4"),
+                                   size=(width, height), fps=fps, crossfade=crossfade)
+        wall = time.perf_counter() - start
+        size = os.path.getsize(video_path)
+    video_seconds = scene_seconds * len(frames)
+    return {"encode_wall_seconds": wall, "realtime_factor": video_seconds / wall, "file_bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, default=12)
+    parser.add_argument("--scene-seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=int, default=MOTION_FPS)
+    parser.add_argument("--crossfade", type=float, default=CROSSFADE_SECONDS)
+    parser.add_argument("--encode", action="store_true", help="Also render end to end through ffmpeg")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    frames = make_frames(args.scenes)
+    result = bench_composite(frames, args.scene_seconds, args.fps, args.crossfade)
+    print(f"{result['frames']} frames at {IMAGE_SIZE[0]}x{IMAGE_SIZE[1]}: "
+          f"{result['fps_per_core']:.1f} fps/core (budget {FPS_PER_CORE_BUDGET:.0f}), "
+          f"{result['composite_cpu_seconds']:.2f}s CPU, plan {result['plan_seconds'] * 1000:.1f}ms")
+    if args.encode:
+        result.update(bench_encode(frames, args.scene_seconds, args.fps, args.crossfade))
+        print(f"end-to-end render: {result['encode_wall_seconds']:.2f}s wall "
+              f"({result['realtime_factor']:.2f}x realtime), {result['file_bytes'] / 1e6:.2f} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "result": result}, f, indent=2)
+    if result["fps_per_core"] < FPS_PER_CORE_BUDGET:
+        print(f"Compositing is below the budget of {FPS_PER_CORE_BUDGET:.0f} fps/core")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Measure build time, lookup latency and recall of the prompt similarity index.
+
+Usage:
+    python benchmarks/bench_prompt_index.py --entries 100000 200000 --queries 2000 --output index_bench.json
+
+Synthetic prompts are drawn from a fixed vocabulary of subjects, settings and
+camera/lighting phrases. Queries are stored prompts with a few words dropped
+or swapped (a re-worded version of the same scene), and recall is the share of
+queries whose original comes back as a match above --threshold.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompt_index import PromptIndex  # noqa: E402
+
+SUBJECTS = ["young scientist", "old scholar", "crowd of students", "queen", "inventor", "painter", "general",
+            "poet", "astronomer", "merchant", "monk", "explorer", "sailor", "physician", "philosopher"]
+SETTINGS = ["19th-century laboratory", "lecture hall", "royal court", "busy harbour", "candle-lit study",
+            "battlefield at dawn", "monastery library", "observatory dome", "market square", "ship deck"]
+DETAILS = ["warm candle light", "soft morning fog", "dramatic shadows", "oil painting texture", "wide angle lens",
+           "close-up portrait", "muted sepia tones", "bright daylight", "rain on the windows", "smoke in the air",
+           "papers scattered on a desk", "brass instruments", "wooden benches", "flags waving", "snow falling"]
+WORDS = sorted({w for phrase in SUBJECTS + SETTINGS + DETAILS for w in phrase.split()})
+
+
+def make_prompt(rng: random.Random) -> str:
+    details = rng.sample(DETAILS, 4)
+    return (f"A {rng.choice(SUBJECTS)} in a {rng.choice(SETTINGS)}, {', '.join(details)}, "
+            f"figure {rng.randrange(10 ** 6)}")
+
+
+def reword(prompt: str, rng: random.Random) -> str:
+    words = prompt.split()
+    for _ in range(2):
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def bench(entries: int, queries: int, threshold: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    prompts = [make_prompt(rng) for _ in range(entries)]
+
+    index = PromptIndex()
+    start = time.perf_counter()
+    for i, prompt in enumerate(prompts):
+        index.add(prompt, f"key-{i}")
+    build_seconds = time.perf_counter() - start
+
+    samples, hits = [], 0
+    for _ in range(queries):
+        i = rng.randrange(entries)
+        query = reword(prompts[i], rng)
+        start = time.perf_counter()
+        matches = index.search(query, threshold)
+        samples.append(time.perf_counter() - start)
+        hits += any(key == f"key-{i}" for key, _, _ in matches)
+
+    samples.sort()
+    return {
+        "entries": entries,
+        "build_seconds": build_seconds,
+        "lookup_median_ms": statistics.median(samples) * 1000,
+        "lookup_p99_ms": samples[int(len(samples) * 0.99) - 1] * 1000,
+        "recall": hits / queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for entries in args.entries:
+        result = bench(entries, args.queries, args.threshold, args.seed)
+        results.append(result)
+        print(f"{entries:>8} entries: build {result['build_seconds']:6.1f}s  "
+              f"lookup median {result['lookup_median_ms']:.3f}ms  p99 {result['lookup_p99_ms']:.3f}ms  "
+              f"recall {result['recall']:.1%}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Compare the in-memory frame renderer, the still-image concat renderer and the
+fixed-fps moviepy renderer.
+
+Usage:
+    python benchmarks/bench_renderer.py --scenes 12 36 108 --duration 180 --output renderer_bench.json
+
+Synthetic 1280x720 scenes and a silent narration of the requested length are
+generated in a temporary directory, then each renderer encodes the same
+slideshow. Every (renderer, scene count) case runs in a fresh process so peak
+memory can be attributed to it: wall time, CPU seconds (the process plus its
+ffmpeg and decode children), output size, and peak RSS of the rendering process
+and of its largest child are reported, which shows how memory grows with the
+number of scenes.
+"""
+import os
+import sys
+import json
+import wave
+import argparse
+import resource
+import tempfile
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_pipeline import IMAGE_SIZE  # noqa: E402
+
+
+def make_scenes(directory: str, count: int) -> list:
+    """Write `count` distinct noisy gradient PNGs so the encoder has real work to do."""
+    width, height = IMAGE_SIZE
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    paths = []
+    for i in range(count):
+        tint = rng.uniform(0.3, 1.0, size=3).astype(np.float32)
+        noise = rng.normal(0, 12, size=(height, width, 3)).astype(np.float32)
+        frame = np.clip(gradient * tint + noise, 0, 255).astype(np.uint8)
+        path = os.path.join(directory, f"scene_{i:03d}.png")
+        Image.fromarray(frame).save(path)
+        paths.append(path)
+    return paths
+
+
+def make_silence(path: str, duration: float, sample_rate: int = 24000) -> str:
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\x00\x00" * int(duration * sample_rate))
+    return path
+
+
+def cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def bench(renderer: str, image_paths: list, duration: float, audio_path: str) -> dict:
+    """Render once; runs in its own process so the RSS figures belong to this case alone."""
+    # Imported here so only the rendering process loads the tool and its clients
+    from image_to_video_generator import AudioStoryVideoTool
+    tool = AudioStoryVideoTool(internal_llm=None, renderer=renderer, output_dir=os.path.dirname(audio_path))
+    baseline = peak_rss_mb(resource.RUSAGE_SELF)
+    wall_start, cpu_start = time.perf_counter(), cpu_seconds()
+    video_path = tool._create_synchronized_video(image_paths, duration, audio_file_path=audio_path)
+    wall, cpu = time.perf_counter() - wall_start, cpu_seconds() - cpu_start
+    size = os.path.getsize(video_path)
+    os.remove(video_path)
+    return {"renderer": renderer, "scenes": len(image_paths), "wall_seconds": wall, "cpu_seconds": cpu,
+            "file_bytes": size, "baseline_rss_mb": baseline,
+            "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+            "peak_child_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN)}
+
+
+def bench_isolated(renderer: str, image_paths: list, duration: float, audio_path: str) -> dict:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(bench, renderer, image_paths, duration, audio_path).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenes", type=int, nargs="+", default=[36])
+    parser.add_argument("--duration", type=float, default=180.0, help="Narration length in seconds")
+    parser.add_argument("--renderers", nargs="+", default=["frames", "concat", "moviepy"])
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        all_paths = make_scenes(tmp_dir, max(args.scenes))
+        audio_path = make_silence(os.path.join(tmp_dir, "narration.wav"), args.duration)
+        for scenes in args.scenes:
+            for renderer in args.renderers:
+                result = bench_isolated(renderer, all_paths[:scenes], args.duration, audio_path)
+                results.append(result)
+                print(f"{renderer:>8} x {scenes:>4} scenes: {result['wall_seconds']:7.2f}s wall, "
+                      f"{result['cpu_seconds']:7.2f}s CPU, {result['file_bytes'] / 1e6:6.2f} MB, "
+                      f"peak RSS {result['peak_rss_mb']:7.1f} MB (baseline {result['baseline_rss_mb']:.1f}), "
+                      f"largest child {result['peak_child_rss_mb']:7.1f} MB")
+
+    report = {"scenes": args.scenes, "duration": args.duration, "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Local stand-ins for Gemini, Deepgram, Serper and the scene-planning LLM.
+
+Each fake sleeps for a configurable latency and returns payloads with the same
+shape as the real client responses, so the tools run end to end without any
+network access or API quota.
+"""
+import io
+import os
+import asyncio
+import json
+import time
+import wave
+import random
+import hashlib
+import tempfile
+import contextlib
+from types import SimpleNamespace
+from typing import Optional
+
+from PIL import Image
+
+import image_to_video_generator
+import text_to_speech
+from clients import registry
+from disk_cache import DiskCache
+from prompt_index import PromptIndex
+
+# Roughly 15 characters of narration per second of speech
+CHARS_PER_SECOND = 15.0
+
+SCENE_WORDS = """harbour castle forest market library workshop river bridge tower garden palace chapel
+scholar soldier merchant queen child monk sailor painter crowd horse lantern map letter telescope
+dawn dusk storm snow rain fog candle fire""".split()
+
+
+def fake_png(prompt: str, size=(1024, 1024)) -> bytes:
+    """Deterministic PNG whose colour depends on the prompt."""
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    image = Image.new("RGB", size, tuple(digest[:3]))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def fake_wav(text: str, sample_rate: int = 24000) -> bytes:
+    """Silent 16-bit mono WAV whose length scales with the text."""
+    frames = int(len(text) / CHARS_PER_SECOND * sample_rate)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\x00\x00" * frames)
+    return buffer.getvalue()
+
+
+class FakeGeminiClient:
+    """
+    Mimics genai.Client().models.generate_content for image generation.
+
+    A slow_fraction of calls take slow_latency instead, to reproduce the long
+    tail of the real API.
+    """
+
+    def __init__(self, latency: float = 0.0, slow_fraction: float = 0.0, slow_latency: float = 0.0):
+        self.latency = latency
+        self.slow_fraction = slow_fraction
+        self.slow_latency = slow_latency
+        self.calls = 0
+        self.models = self
+
+    def generate_content(self, model: str, contents: str, config=None):
+        self.calls += 1
+        time.sleep(self.slow_latency if random.random() < self.slow_fraction else self.latency)
+        part = SimpleNamespace(inline_data=SimpleNamespace(data=fake_png(contents)), text=None)
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+class FakeDeepgramClient:
+    """Mimics clients.DeepgramSpeechClient (speak / aspeak)."""
+
+    latency = 0.0
+    calls = 0
+
+    def __init__(self, api_key: Optional[str] = None, **kwargs):
+        pass
+
+    def speak(self, text: str, model: str, encoding: str, container: str) -> bytes:
+        FakeDeepgramClient.calls += 1
+        time.sleep(FakeDeepgramClient.latency)
+        return fake_wav(text)
+
+    async def aspeak(self, text: str, model: str, encoding: str, container: str) -> bytes:
+        FakeDeepgramClient.calls += 1
+        await asyncio.sleep(FakeDeepgramClient.latency)
+        return fake_wav(text)
+
+
+class FakeLLM:
+    """Mimics the CrewAI LLM .call() used for scene planning."""
+
+    def __init__(self, scene_count: int = 36, latency: float = 0.0):
+        self.scene_count = scene_count
+        self.latency = latency
+        self.calls = 0
+
+    def call(self, prompt: str) -> str:
+        self.calls += 1
+        time.sleep(self.latency)
+        scenes = [
+            {
+                # Distinct wording per scene so the similar-prompt library does not merge them
+                "image_prompt": f"Scene {i}: {' '.join(random.Random(i).sample(SCENE_WORDS, 8))}, soft light",
+                "story_section": f"Section {i} of the story.",
+            }
+            for i in range(1, self.scene_count + 1)
+        ]
+        return "```json\n" + json.dumps(scenes, indent=2) + "\n```"
+
+
+class FakeSerperClient:
+    """Mimics clients.SerperSearchClient, returning canned search results."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def search(self, query: str, num: int = 10, search_type: str = "search", **kwargs) -> dict:
+        self.calls += 1
+        time.sleep(self.latency)
+        return {
+            "searchParameters": {"q": query, "type": search_type, "num": num},
+            "organic": [
+                {"title": f"{query} - Wikipedia", "link": "https://en.wikipedia.org/wiki/Example",
+                 "snippet": f"{query} was born in a small town and later became widely known.", "position": 1},
+                {"title": f"{query} - Biography", "link": "https://www.biography.com/example",
+                 "snippet": f"Early life, career and legacy of {query}.", "position": 2},
+            ][:num],
+            "credits": 1,
+        }
+
+
+@contextlib.contextmanager
+def install_fakes(image_latency: float = 0.0, tts_latency: float = 0.0,
+                  image_slow_fraction: float = 0.0, image_slow_latency: float = 0.0, search_latency: float = 0.0):
+    """
+    Swap the real API clients for fakes and point the caches at a throwaway directory.
+
+    Yields:
+        SimpleNamespace: The installed fakes (gemini, deepgram class, serper) and the temp dir
+    """
+    original_gemini = image_to_video_generator.gemini_client
+    original_image_cache = image_to_video_generator.image_cache
+    original_prompt_library = image_to_video_generator.prompt_library
+    original_audio_cache = text_to_speech.audio_cache
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gemini = FakeGeminiClient(latency=image_latency, slow_fraction=image_slow_fraction,
+                                  slow_latency=image_slow_latency)
+        FakeDeepgramClient.latency = tts_latency
+        FakeDeepgramClient.calls = 0
+        image_to_video_generator.gemini_client = gemini
+        original_deepgram = registry.override("deepgram", FakeDeepgramClient())
+        serper = FakeSerperClient(latency=search_latency)
+        original_serper = registry.override("serper", serper)
+        image_to_video_generator.image_cache = DiskCache(os.path.join(tmp_dir, "images"), 1 << 40, suffix=".png")
+        image_to_video_generator.prompt_library = PromptIndex()
+        text_to_speech.audio_cache = DiskCache(os.path.join(tmp_dir, "tts"), 1 << 40, suffix=".wav")
+        try:
+            yield SimpleNamespace(gemini=gemini, deepgram=FakeDeepgramClient, serper=serper, tmp_dir=tmp_dir)
+        finally:
+            image_to_video_generator.gemini_client = original_gemini
+            registry.override("deepgram", original_deepgram)
+            registry.override("serper", original_serper)
+            image_to_video_generator.image_cache = original_image_cache
+            image_to_video_generator.prompt_library = original_prompt_library
+            text_to_speech.audio_cache = original_audio_cache
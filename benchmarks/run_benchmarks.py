@@ -0,0 +1,186 @@
+"""
+Offline benchmark suite for the storytelling pipeline.
+
+Usage:
+    python benchmarks/run_benchmarks.py --story-words 150 450 900 --scenes 12 36 --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench_before.json --output bench_after.json
+
+Gemini, Deepgram and the scene-planning LLM are replaced by the local fakes in
+benchmarks/fakes.py (with configurable latency), and the image/TTS caches point
+at a throwaway directory so every run is cold. Timed cases:
+
+    tts              MyCustomTool._run                 per story length
+    video            AudioStoryVideoTool._run          per story length x scene count
+    vtt              generate_vtt                      per story length
+    mux              combine_audio_video               per story length
+
+Results are written as JSON together with the git commit, so two files can be
+compared with --compare.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import install_fakes, FakeLLM  # noqa: E402
+from text_to_speech import MyCustomTool  # noqa: E402
+from image_to_video_generator import AudioStoryVideoTool  # noqa: E402
+from video_processing import generate_vtt, combine_audio_video, clean_subtitle_text  # noqa: E402
+from audio_manifest import audio_duration  # noqa: E402
+
+SENTENCE = "The young scholar walked quietly through the old library at dawn."
+
+
+def make_story(words: int) -> str:
+    sentence_words = len(SENTENCE.split())
+    return " ".join([SENTENCE] * max(1, words // sentence_words))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "median_seconds": statistics.median(samples),
+        "min_seconds": min(samples),
+        "samples": samples,
+        "output": output,
+    }
+
+
+def check_path(result: str) -> str:
+    # The tools report failures as strings instead of raising
+    if not os.path.exists(result):
+        raise RuntimeError(result)
+    return result
+
+
+def run_suite(args) -> list:
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="storyteller-bench-")
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        for words in args.story_words:
+            story = make_story(words)
+
+            def synthesize() -> str:
+                # Fresh fakes and caches per run, so every sample is a cold synthesis
+                with install_fakes(image_latency=args.image_latency, tts_latency=args.tts_latency):
+                    return check_path(MyCustomTool()._run(story))
+
+            tts = timed(synthesize, args.repeat)
+            audio_path = tts.pop("output")
+            results.append({"case": "tts", "story_words": words, **tts})
+
+            duration = audio_duration(audio_path)
+            subtitle_text = clean_subtitle_text(story)
+            vtt = timed(lambda: generate_vtt(subtitle_text, duration), args.repeat)
+            vtt.pop("output")
+            results.append({"case": "vtt", "story_words": words, **vtt})
+
+            for scenes in args.scenes:
+                llm = FakeLLM(scene_count=scenes, latency=args.llm_latency)
+
+                def render(embed_audio: bool = True) -> str:
+                    with install_fakes(image_latency=args.image_latency,
+                                       image_slow_fraction=args.image_slow_fraction,
+                                       image_slow_latency=args.image_slow_latency):
+                        tool = AudioStoryVideoTool(internal_llm=llm, embed_audio=embed_audio,
+                                                   renderer=args.renderer)
+                        return check_path(tool._run(audio_path, story))
+
+                video = timed(render, args.repeat)
+                video.pop("output")
+                results.append({"case": "video", "story_words": words, "scenes": scenes, **video})
+
+            silent_video = render(embed_audio=False)
+            mux = timed(lambda: combine_audio_video(silent_video, audio_path, "bench_output.mp4"), args.repeat)
+            mux.pop("output")
+            results.append({"case": "mux", "story_words": words, **mux})
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def case_id(result: dict) -> tuple:
+    return result["case"], result.get("story_words"), result.get("scenes")
+
+
+def compare(previous_path: str, results: list) -> None:
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {case_id(r): r for r in json.load(f)["results"]}
+    print(f"\nComparison against {previous_path}:")
+    for result in results:
+        before = previous.get(case_id(result))
+        if not before:
+            continue
+        ratio = result["median_seconds"] / before["median_seconds"] if before["median_seconds"] else float("inf")
+        flag = "  REGRESSION" if ratio > 1.1 else ""
+        print(f"  {'/'.join(str(p) for p in case_id(result) if p is not None):<22} "
+              f"{before['median_seconds']:8.3f}s -> {result['median_seconds']:8.3f}s ({ratio:5.2f}x){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--story-words", type=int, nargs="+", default=[150, 450, 900])
+    parser.add_argument("--scenes", type=int, nargs="+", default=[12, 36])
+    parser.add_argument("--image-latency", type=float, default=0.5, help="Seconds per fake Gemini image call")
+    parser.add_argument("--image-slow-fraction", type=float, default=0.0,
+                        help="Share of fake Gemini calls that take --image-slow-latency instead")
+    parser.add_argument("--image-slow-latency", type=float, default=10.0, help="Seconds per slow fake Gemini call")
+    parser.add_argument("--tts-latency", type=float, default=0.3, help="Seconds per fake Deepgram call")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Seconds per fake scene-planning call")
+    parser.add_argument("--renderer", default=os.getenv("VIDEO_RENDERER", "frames"),
+                        choices=["frames", "motion", "concat", "moviepy"],
+                        help="Renderer for the video case (defaults to the tool's, VIDEO_RENDERER or frames)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    for result in results:
+        print(f"{'/'.join(str(p) for p in case_id(result) if p is not None):<22} "
+              f"median {result['median_seconds']:8.3f}s  min {result['min_seconds']:8.3f}s")
+
+    if args.compare:
+        compare(args.compare, results)
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": vars(args),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
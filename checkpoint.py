@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class RunCheckpoint:
+    """
+    Record of the stages a run has completed, kept in checkpoint.json inside its workspace.
+
+    Each completed stage stores its JSON-serializable result. String results (or
+    list items) that are absolute paths are treated as the stage's artifacts: a
+    stage only counts as complete while all of them still exist, so a half-written
+    or deleted file makes the stage run again on the next attempt.
+    """
+
+    FILE_NAME = "checkpoint.json"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, self.FILE_NAME)
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f).get("stages", {})
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _artifacts(value: Any) -> List[str]:
+        values = value if isinstance(value, list) else [value]
+        return [v for v in values if isinstance(v, str) and os.path.isabs(v)]
+
+    def completed(self, stage: str) -> bool:
+        with self._lock:
+            entry = self._stages.get(stage)
+        return entry is not None and all(os.path.exists(p) for p in entry["artifacts"])
+
+    def get(self, stage: str) -> Any:
+        """Result of a completed stage (None if it has not completed)."""
+        if not self.completed(stage):
+            return None
+        with self._lock:
+            return self._stages[stage]["value"]
+
+    def save(self, stage: str, value: Any) -> None:
+        """Mark a stage complete with its result."""
+        with self._lock:
+            self._stages[stage] = {"value": value, "artifacts": self._artifacts(value), "completed_at": time.time()}
+            data = json.dumps({"stages": self._stages}, indent=2, ensure_ascii=False).encode("utf-8")
+            _atomic_write(self.path, data)
+
+    def resume(self, stage: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Return the stage's saved result, or run fn and save what it returns.
+
+        Usage:
+            audio_path = checkpoint.resume("tts", narrate, story_text)
+        """
+        if self.completed(stage):
+            logger.info("%s restored from checkpoint", stage)
+            tracing.annotate(resumed=True)
+            return self.get(stage)
+        value = fn(*args, **kwargs)
+        self.save(stage, value)
+        return value
+
+    def write_text(self, name: str, text: str) -> str:
+        """Write a text artifact into the run directory and return its absolute path."""
+        path = os.path.abspath(os.path.join(self.directory, name))
+        _atomic_write(path, text.encode("utf-8"))
+        return path
+
+    def read_text(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
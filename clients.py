@@ -0,0 +1,290 @@
+import os
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Pool sizes apply per service; <SERVICE>_POOL_SIZE (e.g. GEMINI_POOL_SIZE) overrides HTTP_POOL_SIZE
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 16))
+HTTP_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_KEEPALIVE_CONNECTIONS", 16))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 60.0))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 120.0))
+
+SERVICES = ("gemini", "deepgram", "serper")
+DEEPGRAM_SPEAK_URL = "https://api.deepgram.com/v1/speak"
+SERPER_URL = "https://google.serper.dev"
+SERPER_SEARCH_TYPES = ("search", "news")
+
+
+class ConnectionStats:
+    """
+    Requests sent versus connections opened by one service's pools.
+
+    Fed by httpcore's trace extension, so the numbers come from the transport
+    itself: every request that did not open a TCP connection reused a pooled one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.tls_handshakes = 0
+
+    def record(self, event: str, info: Dict[str, Any]) -> None:
+        with self._lock:
+            if event == "connection.connect_tcp.complete":
+                self.connections += 1
+            elif event == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+            elif event.endswith(".send_request_headers.started"):
+                self.requests += 1
+
+    async def arecord(self, event: str, info: Dict[str, Any]) -> None:
+        # The async transport requires a coroutine trace callback
+        self.record(event, info)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            reused = max(0, self.requests - self.connections)
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "tls_handshakes": self.tls_handshakes,
+                "reused": reused,
+                "reuse_ratio": reused / self.requests if self.requests else 0.0,
+            }
+
+
+class DeepgramSpeechClient:
+    """
+    Deepgram text-to-speech over the shared keep-alive pool.
+
+    Sends the same POST /v1/speak request the Deepgram SDK makes, but through the
+    registry's pooled httpx clients instead of a client (and connection) per call.
+    """
+
+    def __init__(self, registry: "ClientRegistry", api_key: str):
+        self._registry = registry
+        self._api_key = api_key
+
+    def _request(self, text: str, model: str, encoding: str, container: str) -> Dict[str, Any]:
+        return {
+            "params": {"model": model, "encoding": encoding, "container": container},
+            "headers": {"Authorization": f"Token {self._api_key}"},
+            "json": {"text": text},
+        }
+
+    def speak(self, text: str, model: str, encoding: str, container: str) -> bytes:
+        """Synthesize text and return the encoded audio bytes."""
+        response = self._registry.http("deepgram").post(
+            DEEPGRAM_SPEAK_URL, **self._request(text, model, encoding, container))
+        response.raise_for_status()
+        return response.content
+
+    async def aspeak(self, text: str, model: str, encoding: str, container: str) -> bytes:
+        """Async variant of speak()."""
+        response = await self._registry.async_http("deepgram").post(
+            DEEPGRAM_SPEAK_URL, **self._request(text, model, encoding, container))
+        response.raise_for_status()
+        return response.content
+
+
+class SerperSearchClient:
+    """
+    Serper (Google search) over the shared keep-alive pool.
+
+    Sends the documented POST /search and /news requests directly, so the
+    research agent's searches do not depend on a third-party tool's internals.
+    """
+
+    def __init__(self, registry: "ClientRegistry", api_key: str):
+        self._registry = registry
+        self._api_key = api_key
+
+    def search(self, query: str, num: int = 10, search_type: str = "search", country: Optional[str] = None,
+               location: Optional[str] = None, locale: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run one search and return Serper's JSON response.
+
+        Args:
+            query: Search query
+            num: Number of results to request
+            search_type: "search" or "news"
+            country: Optional country code (gl)
+            location: Optional location name
+            locale: Optional interface language (hl)
+        """
+        if search_type not in SERPER_SEARCH_TYPES:
+            raise ValueError(f"Invalid search type: {search_type}. Must be one of: {', '.join(SERPER_SEARCH_TYPES)}")
+        payload = {"q": query, "num": num}
+        if country:
+            payload["gl"] = country
+        if location:
+            payload["location"] = location
+        if locale:
+            payload["hl"] = locale
+        response = self._registry.http("serper").post(
+            f"{SERPER_URL}/{search_type}", headers={"X-API-KEY": self._api_key}, json=payload)
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            raise ValueError("Empty response from Serper API")
+        return results
+
+
+class ClientRegistry:
+    """
+    Process-wide pooled HTTP clients for the external APIs.
+
+    Each service gets one keep-alive httpx.Client, shared by every thread, and
+    one httpx.AsyncClient per event loop (async pools cannot cross loops), so
+    concurrent jobs reuse warm TLS connections instead of opening new ones.
+    The API clients built on top (Gemini, Deepgram, Serper) are created once and
+    shared the same way. Requests are traced per service for reuse metrics.
+    """
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, keepalive_connections: int = HTTP_KEEPALIVE_CONNECTIONS,
+                 keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY, timeout: float = HTTP_TIMEOUT):
+        self.pool_size = pool_size
+        self.keepalive_connections = keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._http: Dict[str, httpx.Client] = {}
+        self._async_http: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = \
+            weakref.WeakKeyDictionary()
+        self._clients: Dict[str, Any] = {}
+        self._overrides: Dict[str, Any] = {}
+        self._stats = {service: ConnectionStats() for service in SERVICES}
+
+    def limits(self, service: str) -> httpx.Limits:
+        """Connection limits of a service's pools."""
+        size = int(os.getenv(f"{service.upper()}_POOL_SIZE", self.pool_size))
+        return httpx.Limits(max_connections=size, max_keepalive_connections=min(size, self.keepalive_connections),
+                            keepalive_expiry=self.keepalive_expiry)
+
+    def client_args(self, service: str) -> Dict[str, Any]:
+        """Keyword arguments for an httpx.Client that pools and is traced like the registry's own."""
+        stats = self._stats[service]
+
+        def trace_request(request: httpx.Request) -> None:
+            request.extensions["trace"] = stats.record
+
+        return {"limits": self.limits(service), "timeout": self.timeout, "event_hooks": {"request": [trace_request]}}
+
+    def async_client_args(self, service: str) -> Dict[str, Any]:
+        """Keyword arguments for an httpx.AsyncClient, see client_args()."""
+        stats = self._stats[service]
+
+        async def trace_request(request: httpx.Request) -> None:
+            request.extensions["trace"] = stats.arecord
+
+        return {"limits": self.limits(service), "timeout": self.timeout, "event_hooks": {"request": [trace_request]}}
+
+    def http(self, service: str) -> httpx.Client:
+        """The shared keep-alive client of a service."""
+        with self._lock:
+            client = self._http.get(service)
+            if client is None:
+                client = self._http[service] = httpx.Client(**self.client_args(service))
+            return client
+
+    def async_http(self, service: str) -> httpx.AsyncClient:
+        """The keep-alive async client of a service for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_http.setdefault(loop, {})
+            client = clients.get(service)
+            if client is None:
+                client = clients[service] = httpx.AsyncClient(**self.async_client_args(service))
+            return client
+
+    def _shared(self, key: str, factory) -> Any:
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = factory()
+            return client
+
+    def gemini(self, api_key: Optional[str] = None) -> Any:
+        """
+        Shared google-genai client; both client.models and client.aio use the registry's pool settings.
+
+        Args:
+            api_key: API key (defaults to GEMINI_API_KEY)
+        """
+        if "gemini" in self._overrides:
+            return self._overrides["gemini"]
+        api_key = api_key or os.getenv("GEMINI_API_KEY", "NA")
+
+        def build():
+            from google import genai
+            from google.genai import types
+            return genai.Client(api_key=api_key, http_options=types.HttpOptions(
+                client_args=self.client_args("gemini"), async_client_args=self.async_client_args("gemini")))
+
+        return self._shared(f"gemini:{api_key}", build)
+
+    def deepgram(self, api_key: Optional[str] = None) -> DeepgramSpeechClient:
+        """
+        Shared Deepgram text-to-speech client.
+
+        Args:
+            api_key: API key (defaults to DEEPGRAM_API_KEY)
+        """
+        if "deepgram" in self._overrides:
+            return self._overrides["deepgram"]
+        api_key = api_key or os.getenv("DEEPGRAM_API_KEY", "NA")
+        return self._shared(f"deepgram:{api_key}", lambda: DeepgramSpeechClient(self, api_key))
+
+    def serper(self, api_key: Optional[str] = None) -> SerperSearchClient:
+        """
+        Shared Serper search client.
+
+        Args:
+            api_key: API key (defaults to SERPER_API_KEY)
+        """
+        if "serper" in self._overrides:
+            return self._overrides["serper"]
+        api_key = api_key or os.getenv("SERPER_API_KEY", "NA")
+        return self._shared(f"serper:{api_key}", lambda: SerperSearchClient(self, api_key))
+
+    def override(self, service: str, client: Any) -> Any:
+        """
+        Serve `client` for a service instead of the real one (None restores it); used by the benchmark fakes.
+
+        Returns:
+            The previous override, if any
+        """
+        with self._lock:
+            previous = self._overrides.pop(service, None)
+            if client is not None:
+                self._overrides[service] = client
+            return previous
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Connection-reuse counters of every service since the process started."""
+        return {service: stats.snapshot() for service, stats in self._stats.items()}
+
+    def close(self) -> None:
+        """Close the sync pools."""
+        with self._lock:
+            clients, self._http = list(self._http.values()), {}
+        for client in clients:
+            client.close()
+
+    async def aclose(self) -> None:
+        """Close the async pools of the running event loop."""
+        with self._lock:
+            clients = self._async_http.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.aclose()
+
+
+# Shared by every tool and job in the process
+registry = ClientRegistry()
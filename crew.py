@@ -4,10 +4,14 @@ from crewai import Task
 from crewai import Crew, Process
 from crewai.llm import LLM
 import os
-from crewai_tools import SerperDevTool
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+from typing import Type
 import text_to_speech
 import warnings
 import image_to_video_generator
+import tracing
+from clients import registry
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -27,7 +31,34 @@ llm = LLM(
 )
 video_tool = image_to_video_generator.AudioStoryVideoTool(internal_llm=llm)
 os.environ["SERPER_API_KEY"] = "NA"
-search_web_tool = SerperDevTool()
+
+
+class SearchWebToolInput(BaseModel):
+    """Input schema for the web search tool"""
+    search_query: str = Field(..., description="Mandatory search query you want to use to search the internet")
+
+
+class SearchWebTool(BaseTool):
+    """Serper web search over the shared keep-alive pool (clients.SerperSearchClient)."""
+
+    name: str = "Search the internet with Serper"
+    description: str = "A tool that can be used to search the internet with a search_query."
+    args_schema: Type[BaseModel] = SearchWebToolInput
+    n_results: int = Field(default=10, description="Number of results to return per section")
+
+    def _run(self, search_query: str) -> dict:
+        results = registry.serper().search(search_query, num=self.n_results)
+        formatted = {"searchParameters": {"q": search_query, "type": "search", **results.get("searchParameters", {})}}
+        if "knowledgeGraph" in results:
+            formatted["knowledgeGraph"] = results["knowledgeGraph"]
+        for section in ("organic", "peopleAlsoAsk", "relatedSearches"):
+            if section in results:
+                formatted[section] = results[section][:self.n_results]
+        formatted["credits"] = results.get("credits", 1)
+        return formatted
+
+
+search_web_tool = SearchWebTool()
 
 
 researcher = Agent(
@@ -137,7 +168,7 @@ vedio_generation_task = Task(
         "Call the tool with both parameters to generate the synchronized video." ,
     expected_output="The path (only) of the generated video file using the tool on the topic provided.",  
     agent=vedio_generator,  
-    tools=[image_to_video_generator.AudioStoryVideoTool(internal_llm=llm)],
+    tools=[video_tool],
     context=[writer_task,voice_generation_task] 
 ) 
 crew = Crew(
@@ -145,3 +176,19 @@ crew = Crew(
     tasks=[search_task,writer_task,voice_generation_task,vedio_generation_task],
     process=Process.sequential,
 )
+
+# Span names for the story crew's tasks, recorded as each task completes
+TASK_SPAN_NAMES = {researcher.role: "search", writer.role: "writing"}
+
+
+def trace_task(output):
+    tracing.checkpoint(TASK_SPAN_NAMES.get(output.agent, output.agent), bytes=len(output.raw.encode("utf-8")))
+
+
+# Research and writing only; narration and visuals are driven by pipeline.run_pipeline
+story_crew = Crew(
+    agents=[researcher,writer],
+    tasks=[search_task,writer_task],
+    process=Process.sequential,
+    task_callback=trace_task,
+)
@@ -0,0 +1,224 @@
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Any, Optional, Iterator, Tuple
+
+
+class DiskCache:
+    """
+    Content-addressed file cache with a size cap and LRU eviction.
+
+    Entries live at <directory>/[<group>/]<key><suffix>. Writes go to a temporary
+    file in the target folder and are moved into place with os.replace, so several
+    processes can share one cache directory without ever reading a partial entry.
+    Every hit refreshes the entry's mtime, which is what eviction sorts on.
+    """
+
+    TMP_PREFIX = ".tmp-"
+    STALE_TMP_SECONDS = 3600
+    # Eviction trims to this fraction of max_bytes, so a full cache is not rescanned on every write
+    LOW_WATER = 0.9
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key by hashing the given parts.
+
+        Args:
+            parts: Values that identify the entry (prompt, model name, resolution...)
+
+        Returns:
+            str: Hex SHA-256 digest of the parts
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def _path(self, key: str, group: Optional[str] = None) -> str:
+        folder = os.path.join(self.directory, group) if group else self.directory
+        return os.path.join(folder, key + self.suffix)
+
+    def get(self, key: str, group: Optional[str] = None, record: bool = True) -> Optional[str]:
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key: Cache key
+            group: Optional group the entry was stored under
+            record: Count the lookup in the hit/miss stats; speculative probes pass False
+
+        Returns:
+            Optional[str]: Path of the cached file, or None on a miss
+        """
+        path = self._path(key, group)
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            if record:
+                with self._lock:
+                    self.misses += 1
+            return None
+        if record:
+            with self._lock:
+                self.hits += 1
+        return path
+
+    def get_bytes(self, key: str, group: Optional[str] = None) -> Optional[bytes]:
+        """Return the cached bytes for a key, or None on a miss."""
+        path = self.get(key, group)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            # Evicted by another process between the lookup and the read
+            return None
+
+    def put(self, key: str, data: bytes, group: Optional[str] = None) -> str:
+        """
+        Atomically store bytes under a key, evicting old entries if over the size cap.
+
+        Returns:
+            str: Path of the cached file
+        """
+        path = self._path(key, group)
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=self.TMP_PREFIX, suffix=self.suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self.size()
+            else:
+                self._size += len(data) - replaced
+            over_cap = self._size > self.max_bytes
+        if over_cap:
+            self.evict()
+        return path
+
+    def _entries(self) -> Iterator[Tuple[str, os.stat_result]]:
+        now = time.time()
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if name.startswith(self.TMP_PREFIX):
+                    # Leftovers from writers that died before os.replace
+                    if now - stat.st_mtime > self.STALE_TMP_SECONDS:
+                        try:
+                            os.unlink(path)
+                        except OSError:
+                            pass
+                    continue
+                yield path, stat
+
+    def size(self) -> int:
+        """Total size in bytes of all entries currently on disk."""
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache is below LOW_WATER * max_bytes.
+
+        Returns:
+            int: Number of entries removed
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        target = int(self.max_bytes * self.LOW_WATER)
+        removed = 0
+        for path, stat in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                # Another process evicted it first
+                pass
+            total -= stat.st_size
+            removed += 1
+
+        with self._lock:
+            self._size = total
+            self.evictions += removed
+        return removed
+
+    def invalidate(self, group: str) -> int:
+        """
+        Remove every entry stored under a group.
+
+        Args:
+            group: Group name the entries were stored with
+
+        Returns:
+            int: Number of entries removed
+        """
+        folder = os.path.join(self.directory, group)
+        removed = 0
+        try:
+            names = os.listdir(folder)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            if name.startswith(self.TMP_PREFIX):
+                continue
+            try:
+                os.unlink(os.path.join(folder, name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+
+        with self._lock:
+            # Force a rescan on the next write
+            self._size = None
+        return removed
+
+    def owns(self, path: str) -> bool:
+        """Whether a path points inside this cache's directory."""
+        directory = os.path.abspath(self.directory)
+        return os.path.commonpath([directory, os.path.abspath(path)]) == directory
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters for this process."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
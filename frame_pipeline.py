@@ -0,0 +1,211 @@
+import io
+import os
+import logging
+import tempfile
+import subprocess
+from collections import deque
+from fractions import Fraction
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+from moviepy.config import FFMPEG_BINARY
+
+logger = logging.getLogger(__name__)
+
+# Decoding and resizing are CPU bound, so they run in processes rather than threads
+FRAME_WORKERS = int(os.getenv("FRAME_WORKERS", max(1, min(4, (os.cpu_count() or 2) - 1))))
+# Decoded frames held at once (in flight + waiting for the encoder); 1280x720 RGB is ~2.6 MB each
+FRAME_BUFFER = int(os.getenv("FRAME_BUFFER", 6))
+# Frame rate used when scenes have different durations and frames must be repeated
+VARIABLE_DURATION_FPS = 10
+# Size every scene image is normalized to and every renderer outputs
+IMAGE_SIZE = (1280, 720)
+
+
+def to_rgb(image: Image.Image) -> Image.Image:
+    """Convert any PIL image to RGB, flattening transparency onto white."""
+    if image.mode in ('P', 'PA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode == 'PA' else 'RGB')
+    if image.mode in ('RGBA', 'LA'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image if image.mode == 'RGB' else image.convert('RGB')
+
+
+def decode_frame(source: Union[str, bytes], size: Tuple[int, int]) -> bytes:
+    """
+    Decode an image file or encoded bytes into a packed rgb24 frame of the given size.
+
+    Runs in worker processes, so it only takes and returns picklable values.
+    """
+    with Image.open(source if isinstance(source, str) else io.BytesIO(source)) as image:
+        # Lets JPEG decode straight to a reduced scale when the target is smaller
+        image.draft('RGB', size)
+        image = to_rgb(image)
+        if image.size != tuple(size):
+            image = image.resize(size)
+        return image.tobytes()
+
+
+def iter_frames(sources: Iterable[Union[str, bytes]], size: Tuple[int, int],
+                workers: int = FRAME_WORKERS, buffer_frames: int = FRAME_BUFFER) -> Iterator[bytes]:
+    """
+    Yield decoded rgb24 frames in order, decoding ahead in worker processes.
+
+    At most buffer_frames frames are decoded but not yet consumed, so memory stays
+    flat no matter how many scenes there are.
+    """
+    sources = iter(sources)
+    if workers <= 1:
+        for source in sources:
+            yield decode_frame(source, size)
+        return
+
+    buffer_frames = max(buffer_frames, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for source in sources:
+            pending.append(pool.submit(decode_frame, source, size))
+            if len(pending) >= buffer_frames:
+                break
+        while pending:
+            frame = pending.popleft().result()
+            source = next(sources, None)
+            if source is not None:
+                pending.append(pool.submit(decode_frame, source, size))
+            yield frame
+
+
+def _frame_schedule(durations: List[float]) -> Tuple[Fraction, List[int]]:
+    """Input frame rate and how many times each scene's frame is written."""
+    if max(durations) - min(durations) < 1e-6:
+        # One frame per scene at rate 1/duration, like the concat renderer's single keyframe per scene
+        return Fraction(1 / durations[0]).limit_denominator(1000000), [1] * len(durations)
+    return Fraction(VARIABLE_DURATION_FPS), [max(1, round(d * VARIABLE_DURATION_FPS)) for d in durations]
+
+
+def encode_raw_frames(
+    frames: Iterable[Any],
+    size: Tuple[int, int],
+    rate: Fraction,
+    output_path: str,
+    audio_path: Optional[str] = None,
+    preset: str = "medium",
+    crf: int = 23,
+    video_args: Sequence[str] = (),
+    pixel_format: str = "rgb24",
+) -> str:
+    """
+    Encode packed raw frames written to ffmpeg's stdin into an H.264 MP4.
+
+    Args:
+        frames: Frames in order, as bytes or any C-contiguous buffer (e.g. uint8 arrays);
+            a buffer holding several frames back to back is written in one call
+        size: (width, height) of each frame
+        rate: Input frame rate
+        output_path: Path of the MP4 to write
+        audio_path: Optional narration to mux in during the same encode
+        preset: libx264 preset
+        crf: libx264 constant rate factor
+        video_args: Extra encoder arguments (tuning, keyframe placement)
+        pixel_format: ffmpeg pixel format of the frames (rgb24, or rgb0 for 4-byte pixels)
+
+    Returns:
+        str: Absolute path of the rendered video
+    """
+    width, height = size
+    command = [FFMPEG_BINARY, "-y", "-loglevel", "error",
+               "-f", "rawvideo", "-pix_fmt", pixel_format, "-s", f"{width}x{height}",
+               "-framerate", f"{rate.numerator}/{rate.denominator}", "-i", "pipe:0"]
+    if audio_path:
+        command += ["-i", str(audio_path)]
+    command += ["-map", "0:v:0"]
+    if audio_path:
+        command += ["-map", "1:a:0", "-c:a", "aac"]
+    command += ["-vf", "format=yuv420p", "-c:v", "libx264", "-preset", preset, "-crf", str(crf)]
+    command += list(video_args)
+    command += ["-movflags", "+faststart", str(output_path)]
+
+    # stderr goes to a file so a chatty ffmpeg can never block on a full pipe
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=stderr)
+        try:
+            for frame in frames:
+                process.stdin.write(frame)
+            process.stdin.close()
+        except BrokenPipeError:
+            # ffmpeg exited early; its error output explains why
+            pass
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        returncode = process.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"ffmpeg frame render failed: {stderr.read().decode(errors='replace').strip()}")
+
+    return os.path.abspath(output_path)
+
+
+def render_frames(
+    image_paths: List[str],
+    durations: List[float],
+    output_path: str,
+    audio_path: Optional[str] = None,
+    size: Tuple[int, int] = (1280, 720),
+    preset: str = "medium",
+    crf: int = 23,
+    workers: int = FRAME_WORKERS,
+    buffer_frames: int = FRAME_BUFFER,
+) -> str:
+    """
+    Encode a slideshow by piping decoded frames straight into ffmpeg.
+
+    Each image is decoded and resized exactly once, in worker processes, into a
+    bounded buffer of raw frames that is streamed to ffmpeg's stdin as rawvideo;
+    nothing is re-encoded to an intermediate image format or held in memory for
+    the whole video.
+
+    Args:
+        image_paths: Images in display order
+        durations: Display duration in seconds for each image
+        output_path: Path of the MP4 to write
+        audio_path: Optional narration to mux in during the same encode
+        size: (width, height) of the output
+        preset: libx264 preset
+        crf: libx264 constant rate factor
+        workers: Decode processes (1 decodes in this process)
+        buffer_frames: Maximum decoded frames held at once
+
+    Returns:
+        str: Absolute path of the rendered video
+    """
+    if not image_paths:
+        raise ValueError("No images to render")
+    if len(image_paths) != len(durations):
+        raise ValueError("image_paths and durations must have the same length")
+
+    rate, repeats = _frame_schedule(durations)
+    video_args = ["-tune", "stillimage"]
+    if max(repeats) == 1:
+        # Every frame is a scene change, so make each one seekable
+        video_args += ["-g", "1"]
+    else:
+        # Keyframe at each scene start; the repeats in between cost almost nothing as P-frames
+        starts, total = [], 0
+        for count in repeats:
+            starts.append(f"{float(total / rate):.6f}")
+            total += count
+        video_args += ["-force_key_frames", ",".join(starts)]
+
+    def frames():
+        for frame, count in zip(iter_frames(image_paths, size, workers, buffer_frames), repeats):
+            for _ in range(count):
+                yield frame
+
+    logger.debug("Streaming %d scenes as %d raw frames at %s fps", len(image_paths), sum(repeats), rate)
+    return encode_raw_frames(frames(), size, rate, output_path, audio_path=audio_path,
+                             preset=preset, crf=crf, video_args=video_args)
@@ -0,0 +1,123 @@
+import os
+import math
+import logging
+import subprocess
+from typing import List, Optional, Tuple
+from moviepy.config import FFMPEG_BINARY
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_NAME = "playlist.m3u8"
+# A still needs very few frames per second; segments stay tiny and quick to encode
+SEGMENT_FPS = int(os.getenv("SEGMENT_FPS", 4))
+
+
+def encode_segment(image_path: str, audio_path: str, start: float, duration: float, output_path: str,
+                   size: Optional[Tuple[int, int]] = None, preset: str = "veryfast", crf: int = 23) -> str:
+    """
+    Encode one scene and its span of the narration as a self-contained MPEG-TS segment.
+
+    Timestamps are offset by `start`, so consecutive segments form one continuous
+    timeline, and the segment opens with a keyframe so playback can begin at it.
+
+    Args:
+        image_path: Still shown for the whole segment
+        audio_path: Full narration; only [start, start + duration) is used
+        start: Position of the segment in the video, in seconds
+        duration: Length of the segment in seconds
+        output_path: Path of the .ts file to write
+        size: Optional (width, height) to scale the still to
+        preset: libx264 preset
+        crf: libx264 constant rate factor
+
+    Returns:
+        str: Path of the segment
+    """
+    video_filter = "format=yuv420p"
+    if size:
+        video_filter = f"scale={size[0]}:{size[1]},{video_filter}"
+    command = [
+        FFMPEG_BINARY, "-y", "-loglevel", "error",
+        "-loop", "1", "-framerate", str(SEGMENT_FPS), "-t", f"{duration:.6f}", "-i", str(image_path),
+        "-ss", f"{start:.6f}", "-t", f"{duration:.6f}", "-i", str(audio_path),
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-vf", video_filter,
+        "-c:v", "libx264", "-tune", "stillimage", "-preset", preset, "-crf", str(crf),
+        "-c:a", "aac",
+        "-output_ts_offset", f"{start:.6f}", "-muxdelay", "0",
+        "-f", "mpegts", str(output_path),
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg segment encode failed: {result.stderr.strip()}")
+    return output_path
+
+
+class HlsWriter:
+    """
+    Growing HLS EVENT playlist of per-scene segments.
+
+    Segments are appended in order and the playlist is rewritten atomically after
+    each one, so a player polling it only ever sees complete segments; finish()
+    adds #EXT-X-ENDLIST once the last scene is in. Segment and playlist names are
+    relative, so the directory can be served from any URL prefix.
+    """
+
+    def __init__(self, directory: str, target_duration: float):
+        self.directory = directory
+        # Every segment must fit in the target duration, and an EVENT playlist may not change it
+        self.target_duration = max(1, math.ceil(target_duration))
+        self.playlist_path = os.path.join(directory, PLAYLIST_NAME)
+        self._segments: List[Tuple[str, float]] = []
+        self._position = 0.0
+        self.finished = False
+        os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def add_segment(self, image_path: str, audio_path: str, duration: float,
+                    size: Optional[Tuple[int, int]] = None) -> str:
+        """
+        Encode the next scene, covering the narration from the end of the previous segment.
+
+        Returns:
+            str: Path of the new segment
+        """
+        if self.finished:
+            raise ValueError("Playlist already finished")
+        if duration > self.target_duration:
+            raise ValueError(f"Segment of {duration:.2f}s exceeds the target duration of {self.target_duration}s")
+        name = f"segment_{len(self._segments):03d}.ts"
+        path = os.path.join(self.directory, name)
+        # Written under a temporary name so the server never hands out a partial segment
+        encode_segment(image_path, audio_path, self._position, duration, path + ".part", size=size)
+        os.replace(path + ".part", path)
+        self._segments.append((name, duration))
+        self._position += duration
+        self._write_playlist()
+        return path
+
+    def finish(self) -> str:
+        """Mark the playlist complete so players stop polling it."""
+        self.finished = True
+        self._write_playlist()
+        return self.playlist_path
+
+    def _write_playlist(self) -> None:
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-INDEPENDENT-SEGMENTS",
+        ]
+        for name, duration in self._segments:
+            lines += [f"#EXTINF:{duration:.6f},", name]
+        if self.finished:
+            lines.append("#EXT-X-ENDLIST")
+        temp_path = self.playlist_path + ".part"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_path, self.playlist_path)
@@ -1,28 +1,70 @@
 import os
-import io
-import json
+import time
+import uuid
+import shutil
+import logging
 import tempfile
-from typing import Type, List, Any, Optional
+import random
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FuturesTimeoutError
+from typing import Type, List, Any, Optional, Callable, Iterable, Dict
 from pydantic import BaseModel, Field
-from PIL import Image
+import numpy as np
 from moviepy import ImageSequenceClip, AudioFileClip
 from crewai.tools import BaseTool
-from google import genai
 from google.genai import types
 from dotenv import load_dotenv
+from disk_cache import DiskCache
+from slideshow_renderer import render_slideshow
+from frame_pipeline import IMAGE_SIZE, iter_frames, render_frames
+from motion import render_motion
+from audio_manifest import audio_duration
+from scene_stream import stream_llm_text, iter_json_array
+from latency_stats import LatencyTracker, latency_summary
+from prompt_index import PromptIndex
+from clients import registry
+import tracing
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 GEMINI_API_KEY = "NA"
 
-# Initialize Gemini client for image generation
+# Gemini client for image generation, shared with every run in the process over one keep-alive pool
 try:
-    gemini_client = genai.Client(api_key=GEMINI_API_KEY)
+    gemini_client = registry.gemini(GEMINI_API_KEY)
 except Exception as e:
-    print(f"Error initializing Gemini client: {e}. Please ensure GEMINI_API_KEY is valid.")
+    logger.error("Error initializing Gemini client: %s. Please ensure GEMINI_API_KEY is valid.", e)
     gemini_client = None
 
+IMAGE_MODEL = "gemini-2.0-flash-preview-image-generation"
+
+# Generated scenes are cached on disk so repeated prompts never hit Gemini twice
+image_cache = DiskCache(
+    os.getenv("IMAGE_CACHE_DIR", os.path.join("cache", "images")),
+    max_bytes=int(os.getenv("IMAGE_CACHE_MAX_BYTES", 2 * 1024 ** 3)),
+    suffix=".png",
+)
+
+# Prompts of every generated image, so re-worded prompts for the same scene can reuse it
+prompt_library = PromptIndex(os.getenv("PROMPT_INDEX_PATH", os.path.join("cache", "prompt_index.jsonl")))
+
+# Recent Gemini image latencies, shared by all runs in the process to pick the hedging threshold
+image_latency = LatencyTracker()
+HEDGE_MIN_SAMPLES = 20
+
+
+def _discard_image(future) -> None:
+    """Done-callback that deletes the image produced by a request nobody is waiting for."""
+    if not future.cancelled() and future.exception() is None:
+        try:
+            os.unlink(future.result())
+        except OSError:
+            pass
+
 
 class AudioStoryVideoInput(BaseModel):
     """Input schema for AudioStoryVideoTool."""
@@ -37,18 +79,53 @@ class AudioStoryVideoTool(BaseTool):
     
     # Define internal_llm as a proper field
     internal_llm: Optional[Any] = Field(default=None, description="Internal LLM instance for story processing")
+
+    # Image stage concurrency settings
+    max_image_workers: int = Field(default=6, description="Maximum number of concurrent image generation requests")
+    image_timeout: float = Field(default=60.0, description="Timeout in seconds for a single image generation request")
+    image_retries: int = Field(default=2, description="Retries for a failed scene image before falling back to a neighbouring scene")
+    image_retry_backoff: float = Field(default=1.0, description="Base delay in seconds between image retries")
+    hedge_percentile: Optional[float] = Field(
+        default=95.0,
+        description="Send a duplicate request once a scene is slower than this percentile of recent latencies (None disables hedging)"
+    )
+    similar_image_threshold: Optional[float] = Field(
+        default=0.8,
+        description="Reuse a stored image whose prompt is at least this similar (0-1, word/bigram overlap); None disables"
+    )
+    image_budget: Optional[float] = Field(
+        default=300.0,
+        description="Seconds the whole image stage may take before missing scenes reuse a neighbouring image (None waits indefinitely)"
+    )
+
+    # Mux the narration during the single video encode instead of in a second pass
+    embed_audio: bool = Field(default=True, description="Write the narration into the rendered video")
+    renderer: str = Field(
+        default=os.getenv("VIDEO_RENDERER", "frames"),
+        description="'frames' pipes each still, decoded once in worker processes, straight to ffmpeg; "
+                    "'motion' adds slow pan/zoom and crossfades; "
+                    "'concat' encodes each still once with its display duration; 'moviepy' renders fixed 24fps frames"
+    )
+    output_dir: str = Field(default="generated_story_videos", description="Directory for scene images and the rendered video")
+    resume_images: bool = Field(
+        default=False,
+        description="Keep scene images as images/scene_XX.png in output_dir and reuse them on the next run "
+                    "instead of regenerating, as long as the scene's prompt is unchanged"
+    )
     
     def __init__(self, internal_llm: Any = None, **kwargs):
         # Pass internal_llm as a keyword argument to super().__init__()
         super().__init__(internal_llm=internal_llm, **kwargs)
         
         if self.internal_llm is None:
-            print("Warning: 'internal_llm' not provided. Please provide an LLM instance.")
+            logger.warning("'internal_llm' not provided. Please provide an LLM instance.")
 
     def _get_audio_duration(self, audio_file_path: str) -> float:
         """
         Calculate the duration of an audio file in seconds.
         
+        Reads the TTS manifest or WAV header instead of decoding the audio.
+        
         Args:
             audio_file_path: Path to the audio file
             
@@ -56,46 +133,26 @@ class AudioStoryVideoTool(BaseTool):
             float: Duration in seconds
         """
         try:
-            audio_clip = AudioFileClip(audio_file_path)
-            duration = audio_clip.duration
-            audio_clip.close()
-            print(f"Audio duration: {duration:.2f} seconds")
+            duration = audio_duration(audio_file_path)
+            logger.info("Audio duration: %.2f seconds", duration)
             return duration
         except Exception as e:
-            print(f"Error reading audio file: {e}")
+            logger.error("Error reading audio file: %s", e)
             raise
 
-    def _extract_json_from_response(self, response_text: str) -> str:
-        """
-        Extracts JSON from LLM response, handling various formatting issues.
-        """
-        response_text = response_text.strip()
-        
-        # Remove markdown code blocks
-        if response_text.startswith("```json"):
-            response_text = response_text[7:].strip()
-        elif response_text.startswith("```"):
-            response_text = response_text[3:].strip()
-        
-        if response_text.endswith("```"):
-            response_text = response_text[:-3].strip()
-        
-        # Find JSON array boundaries
-        start_idx = response_text.find('[')
-        end_idx = response_text.rfind(']')
-        
-        if start_idx == -1 or end_idx == -1:
-            raise ValueError("No JSON array found in response")
-        
-        json_str = response_text[start_idx:end_idx + 1]
-        return json_str
-
-    def _generate_story_sections_and_prompts(self, story_text: str) -> tuple[List[str], List[str]]:
+    def _generate_story_sections_and_prompts(self, story_text: str, style: Optional[str] = None,
+                                             on_scene: Optional[Callable[[str], None]] = None) -> tuple[List[str], List[str]]:
         """
         Uses LLM to divide story into 36 sections and generate image prompts.
         
+        The response is streamed and parsed incrementally, so on_scene receives each
+        image prompt as soon as its JSON object is complete rather than after the
+        whole array has arrived.
+        
         Args:
             story_text: The complete story text
+            style: Optional visual style every prompt should ask for (e.g. "Comic", "Realistic")
+            on_scene: Optional callback invoked with each image prompt as it is parsed
             
         Returns:
             tuple: (image_prompts, story_sections)
@@ -103,7 +160,9 @@ class AudioStoryVideoTool(BaseTool):
         if not self.internal_llm:
             raise ValueError("Internal LLM not provided. Cannot generate prompts.")
         
-        print("Generating 36 story sections and image prompts...")
+        logger.info("Generating 36 story sections and image prompts...")
+        
+        style_requirement = f"- Every image prompt must explicitly ask for a {style.lower()} visual style" if style else ""
         
         prompt_instruction = f"""
         You are an expert visual storyteller. Your task is to:
@@ -116,6 +175,7 @@ class AudioStoryVideoTool(BaseTool):
         - Maintain visual consistency across all prompts (character appearance, style, etc.)
         - Keep in mind that the AI image generator do not know the previous prompt which you have written, so in order to maintain consistency you have to write the prompt yourself in a way that maintain consistency.
         - For instance,If you are defining a character in a story,define it the same everytime in prompt.
+        {style_requirement}
         
         Return your response as a JSON array with exactly 36 objects, each containing:
         - "image_prompt": detailed prompt for image generation
@@ -144,31 +204,30 @@ class AudioStoryVideoTool(BaseTool):
         """
         
         
-        # Generate response using CrewAI LLM call method
-        response = self.internal_llm.call(prompt_instruction)
-        
-        print(f"LLM response received (first 200 chars): {response}...")
-        
-        # Extract and parse JSON
-        json_string = self._extract_json_from_response(response)
-        parsed_data = json.loads(json_string)
-        
-        # Validate structure
-        # if not isinstance(parsed_data, list) or len(parsed_data) != 36:
-        #     raise ValueError(f"Expected 36 sections, got {len(parsed_data)}")
-        
-        # Extract prompts and sections
+        # Extract prompts and sections while the response is still being generated
         image_prompts = []
         story_sections = []
         
-        for i, item in enumerate(parsed_data):
-            if not isinstance(item, dict) or 'image_prompt' not in item or 'story_section' not in item:
-                raise ValueError(f"Invalid structure in item {i}")
-            
-            image_prompts.append(item['image_prompt'])
-            story_sections.append(item['story_section'])
+        with tracing.span("llm_scene_split", prompt_chars=len(prompt_instruction)) as llm_span:
+            start = time.perf_counter()
+            for i, item in enumerate(iter_json_array(stream_llm_text(self.internal_llm, prompt_instruction))):
+                if not isinstance(item, dict) or 'image_prompt' not in item or 'story_section' not in item:
+                    raise ValueError(f"Invalid structure in item {i}")
+                
+                if i == 0:
+                    llm_span.set(first_scene_seconds=time.perf_counter() - start)
+                    logger.debug("First scene parsed after %.2fs", time.perf_counter() - start)
+                image_prompts.append(item['image_prompt'])
+                story_sections.append(item['story_section'])
+                if on_scene:
+                    on_scene(item['image_prompt'])
+            llm_span.set(scenes=len(image_prompts))
         
-        print(f"Successfully generated {len(image_prompts)} image prompts")
+        # Validate structure
+        # if len(image_prompts) != 36:
+        #     raise ValueError(f"Expected 36 sections, got {len(image_prompts)}")
+        
+        logger.info("Successfully generated %d image prompts", len(image_prompts))
         return image_prompts, story_sections
             
         
@@ -184,17 +243,65 @@ class AudioStoryVideoTool(BaseTool):
         Returns:
             str: Path to the generated image file
         """
+        return self._image_from_cache(prompt, scene_number) or self._request_image(prompt, scene_number)
+
+    def _image_cache_key(self, prompt: str) -> str:
+        width, height = IMAGE_SIZE
+        return DiskCache.make_key(prompt, IMAGE_MODEL, f"{width}x{height}")
+
+    def _image_from_cache(self, prompt: str, scene_number: int) -> Optional[str]:
+        """
+        Copy a stored image for the prompt into a scene file: the exact prompt first,
+        then the most similar library prompt above similar_image_threshold.
+        Returns None when neither is available.
+        """
+        image_path = self._copy_cached_image(self._image_cache_key(prompt), scene_number)
+        if image_path:
+            tracing.annotate(cached=True, bytes=os.path.getsize(image_path))
+            logger.debug("Image for scene %d served from cache", scene_number)
+            return image_path
+        
+        if self.similar_image_threshold is None:
+            return None
+        for cache_key, similarity, stored_prompt in prompt_library.search(prompt, self.similar_image_threshold):
+            # Speculative probe: kept out of the hit/miss stats
+            image_path = self._copy_cached_image(cache_key, scene_number, record=False)
+            if image_path:
+                tracing.annotate(cached=True, similar=round(similarity, 3), bytes=os.path.getsize(image_path))
+                logger.debug("Image for scene %d reused from a %.2f-similar prompt: %.80s",
+                             scene_number, similarity, stored_prompt)
+                return image_path
+        return None
+
+    def _copy_cached_image(self, cache_key: str, scene_number: int, record: bool = True) -> Optional[str]:
+        cached_path = image_cache.get(cache_key, record=record)
+        if not cached_path:
+            return None
+        # Copy out of the cache so the caller can delete its file without touching the entry
+        temp_file = self._scene_image_file(scene_number)
+        temp_file.close()
+        try:
+            shutil.copyfile(cached_path, temp_file.name)
+            return temp_file.name
+        except FileNotFoundError:
+            # Evicted by another process after the lookup
+            os.unlink(temp_file.name)
+            return None
+
+    def _request_image(self, prompt: str, scene_number: int) -> str:
+        """Request one image from Gemini, cache it and write it to a scene file."""
         if not gemini_client:
             raise ValueError("Gemini client not initialized")
         
         
-        print(f"Generating image for scene {scene_number}: {prompt[:50]}...")
+        logger.debug("Generating image for scene %d: %.50s...", scene_number, prompt)
         
         response = gemini_client.models.generate_content(
-            model="gemini-2.0-flash-preview-image-generation",
+            model=IMAGE_MODEL,
             contents=prompt,
             config=types.GenerateContentConfig(
-                response_modalities=['IMAGE', 'TEXT']
+                response_modalities=['IMAGE', 'TEXT'],
+                http_options=types.HttpOptions(timeout=int(self.image_timeout * 1000))
             )
         )
         
@@ -208,38 +315,318 @@ class AudioStoryVideoTool(BaseTool):
         if not image_part:
             raise ValueError("No image generated in response")
         
-        # Process and save image
-        img_data = image_part.inline_data.data
-        image = Image.open(io.BytesIO(img_data))
+        # Stored exactly as returned: decoding, colour conversion and resizing happen once,
+        # in the renderers (frame_pipeline.decode_frame or ffmpeg's scale filter)
+        png_data = image_part.inline_data.data
         
-        # Convert image format if needed
-        if image.mode in ('P', 'PA'):
-            image = image.convert('RGB')
-        elif image.mode == 'RGBA':
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            background.paste(image, mask=image.split()[-1])
-            image = background
-        
-        # Resize to standard video resolution
-        image = image.resize((1280, 720))
+        try:
+            cache_key = self._image_cache_key(prompt)
+            image_cache.put(cache_key, png_data)
+            prompt_library.add(prompt, cache_key)
+        except OSError as e:
+            logger.warning("Could not cache image for scene %d: %s", scene_number, e)
             
         # Save to temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f'_scene_{scene_number}.png')
-        image.save(temp_file.name, 'PNG')
+        temp_file = self._scene_image_file(scene_number)
+        temp_file.write(png_data)
         temp_file.close()
         
-        print(f"Image for scene {scene_number} saved to: {temp_file.name}")
+        tracing.annotate(cached=False, bytes=len(png_data))
+        logger.debug("Image for scene %d saved to: %s", scene_number, temp_file.name)
         return temp_file.name
+
+    def _hedged_request(self, prompt: str, scene_number: int, request_pool: ThreadPoolExecutor) -> str:
+        """
+        Request an image, sending a duplicate request if the first one is slower than
+        the hedge_percentile of recent latencies. The first success wins.
+        """
+        def timed_request() -> str:
+            start = time.perf_counter()
+            image_path = self._request_image(prompt, scene_number)
+            image_latency.record(time.perf_counter() - start)
+            return image_path
+        
+        requests = [request_pool.submit(tracing.propagate(timed_request))]
+        hedge_after = None
+        if self.hedge_percentile and len(image_latency) >= HEDGE_MIN_SAMPLES:
+            hedge_after = image_latency.percentile(self.hedge_percentile)
+        if hedge_after is not None:
+            done, _ = wait(requests, timeout=hedge_after)
+            if not done:
+                logger.debug("Scene %d slower than p%g (%.2fs), sending a hedged request",
+                             scene_number, self.hedge_percentile, hedge_after)
+                tracing.annotate(hedged=True)
+                requests.append(request_pool.submit(tracing.propagate(timed_request)))
+        
+        pending = set(requests)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, timeout=self.image_timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                error = TimeoutError(f"Scene {scene_number} missed its {self.image_timeout:.0f}s deadline")
+                break
+            for request in done:
+                if request.exception() is None:
+                    for loser in pending:
+                        loser.add_done_callback(_discard_image)
+                    return request.result()
+                error = request.exception()
+        for loser in pending:
+            loser.add_done_callback(_discard_image)
+        raise error
+
+    def _request_image_with_retries(self, prompt: str, scene_number: int, request_pool: ThreadPoolExecutor,
+                                    deadline: Optional[float] = None) -> str:
+        """Hedged image request retried with jittered backoff, never retrying past the stage deadline."""
+        for attempt in range(self.image_retries + 1):
+            try:
+                image_path = self._hedged_request(prompt, scene_number, request_pool)
+                tracing.annotate(retries=attempt)
+                return image_path
+            except Exception as e:
+                delay = self.image_retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                if attempt == self.image_retries or (deadline is not None and time.perf_counter() + delay > deadline):
+                    raise
+                logger.warning("Retrying scene %d in %.2fs after error: %s (attempt %d/%d)",
+                               scene_number, delay, e, attempt + 2, self.image_retries + 1)
+                time.sleep(delay)
+
+    def _scene_image_file(self, scene_number: int):
+        # Scene images live next to the video so a run's files stay in one directory
+        image_dir = os.path.join(self.output_dir, "images")
+        os.makedirs(image_dir, exist_ok=True)
+        return tempfile.NamedTemporaryFile(delete=False, dir=image_dir, suffix=f'_scene_{scene_number}.png')
+
+    def _scene_image_path(self, scene_number: int) -> str:
+        return os.path.join(self.output_dir, "images", f"scene_{scene_number:02d}.png")
+
+    def _scene_key_path(self, scene_number: int) -> str:
+        # Cache key of the prompt a kept scene image was generated for
+        return os.path.join(self.output_dir, "images", f"scene_{scene_number:02d}.key")
+
+    def _resumable_scene_image(self, prompt: str, scene_number: int) -> Optional[str]:
+        """The kept image of a scene, if it was generated for this exact prompt."""
+        scene_path = self._scene_image_path(scene_number)
+        try:
+            with open(self._scene_key_path(scene_number), encoding="utf-8") as f:
+                stored_key = f.read().strip()
+        except FileNotFoundError:
+            return None
+        if stored_key != self._image_cache_key(prompt) or not os.path.exists(scene_path):
+            # Left over from an earlier scene plan
+            return None
+        return scene_path
+
+    def _keep_scene_image(self, image_path: str, prompt: str, scene_number: int) -> str:
+        """Move a finished image to its scene name and record the prompt it belongs to."""
+        scene_path = self._scene_image_path(scene_number)
+        key_path = self._scene_key_path(scene_number)
+        # Key removed first, so a crash in between never pairs a key with another prompt's image
+        try:
+            os.unlink(key_path)
+        except FileNotFoundError:
+            pass
+        os.replace(image_path, scene_path)
+        with open(key_path + ".part", "w", encoding="utf-8") as f:
+            f.write(self._image_cache_key(prompt))
+        os.replace(key_path + ".part", key_path)
+        return scene_path
+
+    def generate_images(self, image_prompts: Iterable[str],
+                        on_image: Optional[Callable[[int, str], None]] = None) -> List[str]:
+        """
+        Generate images for all prompts concurrently, keeping scene order.
+        
+        Prompts are read on a separate thread and each is submitted as soon as the
+        iterable yields it, while finished scenes are handled (and on_image called) as
+        they complete, so a generator fed by the streaming scene planner overlaps
+        planning with generation and with the callback's consumers. Requests are
+        retried, hedged when slow, and bounded by image_budget; scenes that still have
+        no image reuse the nearest neighbouring scene.
+        
+        Args:
+            image_prompts: Image prompts in scene order, one per scene (list or lazy iterable)
+            on_image: Optional callback(scene_number, path) invoked as each scene image is ready
             
+        Returns:
+            List[str]: One image path per scene in scene order (empty if every scene failed)
+        """
+        workers = max(1, self.max_image_workers)
+        results: Dict[int, str] = {}
+        latencies = {}
+        stage_start = time.perf_counter()
+        deadline = stage_start + self.image_budget if self.image_budget else None
+        
+        def timed_generate(prompt: str, scene_number: int) -> str:
+            if self.resume_images:
+                scene_path = self._resumable_scene_image(prompt, scene_number)
+                if scene_path:
+                    # Finished by an earlier attempt of this run, for the same prompt
+                    return scene_path
+            start = time.perf_counter()
+            try:
+                with tracing.span("image_scene", scene=scene_number):
+                    image_path = (self._image_from_cache(prompt, scene_number)
+                                  or self._request_image_with_retries(prompt, scene_number, request_pool, deadline))
+            finally:
+                latencies[scene_number] = time.perf_counter() - start
+            if self.resume_images:
+                # Only complete images ever appear under the scene name
+                return self._keep_scene_image(image_path, prompt, scene_number)
+            return image_path
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-scene")
+        # Room for one hedged duplicate per scene in flight
+        request_pool = ThreadPoolExecutor(max_workers=workers * 2, thread_name_prefix="image-request")
+        futures = {}
+        # Finished futures, then None once the prompts are exhausted
+        completed = queue.Queue()
+        budget_exhausted = threading.Event()
+        planned = [0]
+        prompt_errors = []
+        
+        def submit_prompts() -> None:
+            # Runs beside the consumer below, so scenes complete while prompts are still arriving
+            try:
+                for i, prompt in enumerate(image_prompts, 1):
+                    planned[0] = i
+                    if budget_exhausted.is_set():
+                        # Still counted so the video keeps every planned scene
+                        continue
+                    future = executor.submit(tracing.propagate(timed_generate), prompt, i)
+                    futures[future] = i
+                    future.add_done_callback(completed.put)
+            except BaseException as e:
+                prompt_errors.append(e)
+            finally:
+                completed.put(None)
+        
+        handled = set()
+        
+        def handle(future) -> None:
+            handled.add(future)
+            scene_number = futures[future]
+            try:
+                results[scene_number] = future.result()
+                logger.debug("Scene %d generated in %.2fs", scene_number, latencies.get(scene_number, 0.0))
+                if on_image:
+                    on_image(scene_number, results[scene_number])
+            except Exception as e:
+                logger.warning("Failed to generate image for section %d after %.2fs: %s",
+                               scene_number, latencies.get(scene_number, 0.0), e)
+        
+        producer = threading.Thread(target=tracing.propagate(submit_prompts), name="image-prompts", daemon=True)
+        try:
+            producer.start()
+            prompts_done = False
+            try:
+                while not prompts_done or len(handled) < len(futures):
+                    timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                    try:
+                        future = completed.get(timeout=timeout)
+                    except queue.Empty:
+                        raise FuturesTimeoutError()
+                    if future is None:
+                        prompts_done = True
+                    else:
+                        handle(future)
+            except FuturesTimeoutError:
+                budget_exhausted.set()
+                # The rest of the plan is still needed for the scene count
+                producer.join()
+                for future in list(futures):
+                    if future.done() and future not in handled and not future.cancelled():
+                        handle(future)
+                late = [future for future in futures if not future.done()]
+                logger.warning("Image budget of %.0fs exhausted with %d scenes outstanding",
+                               self.image_budget, len(late))
+                if not self.resume_images:
+                    # Late images are only worth keeping when a retry of this run can pick them up
+                    for future in late:
+                        future.add_done_callback(_discard_image)
+        finally:
+            budget_exhausted.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            request_pool.shutdown(wait=False)
+        if prompt_errors:
+            raise prompt_errors[0]
+        elapsed = time.perf_counter() - stage_start
+        
+        scene_count = planned[0]
+        missing = [n for n in range(1, scene_count + 1) if n not in results]
+        image_paths = []
+        if results:
+            for scene_number in range(1, scene_count + 1):
+                # Stand in for a missing scene with the closest one that has an image
+                neighbour = min(results, key=lambda n: (abs(n - scene_number), n))
+                image_paths.append(results[neighbour])
+            if missing:
+                logger.warning("Reusing neighbouring scenes for %d missing scenes: %s", len(missing), missing)
+        
+        tail = latency_summary(latencies.values())
+        tracing.annotate(fallback_scenes=len(missing), **{k: v for k, v in tail.items() if v is not None})
+        if latencies:
+            slowest = max(latencies, key=latencies.get)
+            logger.info("Image stage: %d/%d images in %.2fs with %d workers (%.2f images/s, "
+                        "mean %.2fs, p50 %.2fs, p95 %.2fs, p99 %.2fs, slowest scene %d at %.2fs)",
+                        len(results), scene_count, elapsed, workers,
+                        len(results) / elapsed if elapsed else 0.0,
+                        sum(latencies.values()) / len(latencies),
+                        tail["p50"], tail["p95"], tail["p99"], slowest, latencies[slowest])
+        cache_stats = image_cache.stats()
+        logger.info("Image cache: %d hits, %d misses, %d evictions",
+                    cache_stats["hits"], cache_stats["misses"], cache_stats["evictions"])
+        return image_paths
+        
+
+    def _render_with_moviepy(self, image_paths: List[str], durations: List[float], video_filename: str,
+                             audio_file_path: Optional[str] = None) -> None:
+        """
+        Render the slideshow through moviepy at a fixed 24fps.
         
+        Args:
+            image_paths: List of paths to image files
+            durations: Display duration in seconds for each image
+            video_filename: Path of the video file to write
+            audio_file_path: Narration to mux in during the same encode (video only when None)
+        """
+        # Create video clip from images
+        logger.info("Creating video from %d images...", len(image_paths))
+        # Scene images are stored as generated, so normalize them to one size for moviepy
+        width, height = IMAGE_SIZE
+        frames = [np.frombuffer(frame, dtype=np.uint8).reshape(height, width, 3)
+                  for frame in iter_frames(image_paths, IMAGE_SIZE)]
+        video_clip = ImageSequenceClip(frames, durations=durations)
+        
+        # Set the duration to match the total duration
+        #video_clip = video_clip.set_duration(total_duration)
+        
+        audio_clip = None
+        if audio_file_path:
+            # Attach the narration so the final file comes out of a single encode
+            audio_clip = AudioFileClip(audio_file_path)
+            video_clip = video_clip.with_audio(audio_clip)
+        
+        # Write video file
+        video_clip.write_videofile(
+            video_filename, fps=24, codec="libx264",
+            audio_codec="aac" if audio_clip else None
+        )
+        
+        # Clean up clips
+        video_clip.close()
+        if audio_clip:
+            audio_clip.close()
 
-    def _create_synchronized_video(self, image_paths: List[str], total_duration: float) -> str:
+    def _create_synchronized_video(self, image_paths: List[str], total_duration: float,
+                                   audio_file_path: Optional[str] = None) -> str:
         """
-        Create a video from images synchronized with audio duration (video only, no audio).
+        Create a video from images synchronized with audio duration.
         
         Args:
             image_paths: List of paths to image files
             total_duration: Total duration in seconds
+            audio_file_path: Narration to mux in during the same encode (video only when None)
             
         Returns:
             str: Path to the generated video file
@@ -247,33 +634,83 @@ class AudioStoryVideoTool(BaseTool):
         
         # Calculate duration per image
         duration_per_image = total_duration / len(image_paths)
-        print(f"Each image will be displayed for {duration_per_image:.2f} seconds")
+        logger.info("Each image will be displayed for %.2f seconds", duration_per_image)
         
-        # Create output directory
-        output_dir = "generated_story_videos"
-        os.makedirs(output_dir, exist_ok=True)
-        video_filename = os.path.join(output_dir, "synchronized_story_video.mp4")
+        # Create output directory; the name is unique so concurrent renders never collide
+        os.makedirs(self.output_dir, exist_ok=True)
+        video_filename = os.path.join(self.output_dir, f"synchronized_story_video_{uuid.uuid4().hex}.mp4")
         
         # Create image durations list
         durations = [duration_per_image] * len(image_paths)
         
-        # Create video clip from images
-        print(f"Creating video from {len(image_paths)} images...")
-        video_clip = ImageSequenceClip(image_paths, durations=durations)
+        with tracing.span("video_encode", renderer=self.renderer, scenes=len(image_paths),
+                          with_audio=bool(audio_file_path)) as encode_span:
+            if self.renderer == "frames":
+                logger.info("Streaming %d decoded stills to the encoder...", len(image_paths))
+                render_frames(image_paths, durations, video_filename, audio_path=audio_file_path, size=IMAGE_SIZE)
+            elif self.renderer == "motion":
+                logger.info("Compositing %d scenes with pan/zoom and crossfades...", len(image_paths))
+                render_motion(image_paths, durations, video_filename, audio_path=audio_file_path, size=IMAGE_SIZE)
+            elif self.renderer == "concat":
+                logger.info("Encoding %d stills with variable frame durations...", len(image_paths))
+                render_slideshow(image_paths, durations, video_filename, audio_path=audio_file_path, size=IMAGE_SIZE)
+            else:
+                self._render_with_moviepy(image_paths, durations, video_filename, audio_file_path)
+            encode_span.set(bytes=os.path.getsize(video_filename))
+        
+        logger.info("Video created successfully: %s", os.path.abspath(video_filename))
+        return os.path.abspath(video_filename)
         
-        # Set the duration to match the total duration
-        #video_clip = video_clip.set_duration(total_duration)
         
-        # Write video file (video only, no audio)
-        video_clip.write_videofile(video_filename, fps=24, codec="libx264")
+
+    def plan_scenes(self, story_text: str, style: Optional[str] = None,
+                    on_scene: Optional[Callable[[str], None]] = None) -> List[str]:
+        """
+        Divide the story into scenes and return one image prompt per scene.
         
-        # Clean up clip
-        video_clip.close()
+        Args:
+            story_text: The complete story text
+            style: Optional visual style for the prompts
+            on_scene: Optional callback receiving each prompt as soon as it is parsed
+            
+        Returns:
+            List[str]: Image prompts in scene order
+        """
+        image_prompts, _ = self._generate_story_sections_and_prompts(story_text, style, on_scene)
+        return image_prompts
+
+    def render_video(self, image_paths: List[str], audio_file_path: str) -> str:
+        """
+        Render the scene images against the narration. This is the only step that needs the audio.
         
-        print(f"Video created successfully: {os.path.abspath(video_filename)}")
-        return os.path.abspath(video_filename)
+        Args:
+            image_paths: Scene images in order
+            audio_file_path: Path to the narration
+            
+        Returns:
+            str: Path to the generated video file
+        """
+        if not image_paths:
+            raise ValueError("No images were successfully generated")
         
+        if len(image_paths) != 36:
+            logger.warning("Only %d images generated instead of 36", len(image_paths))
         
+        audio_duration = self._get_audio_duration(audio_file_path)
+        return self._create_synchronized_video(
+            image_paths, audio_duration,
+            audio_file_path=audio_file_path if self.embed_audio else None
+        )
+
+    def cleanup_images(self, image_paths: List[str]) -> None:
+        """Delete the temporary scene images."""
+        # Scenes filled in from a neighbour share a file
+        for image_file in dict.fromkeys(image_paths):
+            try:
+                os.unlink(image_file)
+                logger.debug("Cleaned up temporary file: %s", image_file)
+            except OSError as e:
+                logger.warning("Error cleaning up file %s: %s", image_file, e)
 
     def _run(self, audio_file_path: str, story_text: str) -> str:
         """
@@ -289,46 +726,27 @@ class AudioStoryVideoTool(BaseTool):
         temp_image_files = []
         
         try:
-            # Step 1: Get audio duration
-            print("Step 1: Analyzing audio duration...")
-            audio_duration = self._get_audio_duration(audio_file_path)
+            # Step 1: Generate story sections and image prompts
+            logger.info("Step 1: Generating story sections and image prompts...")
+            image_prompts = self.plan_scenes(story_text)
             
-            # Step 2: Generate story sections and image prompts
-            print("Step 2: Generating story sections and image prompts...")
-            image_prompts, story_sections = self._generate_story_sections_and_prompts(story_text)
-            
-            # Step 3: Generate images for each section
-            print("Step 3: Generating images for each section...")
-            for i, prompt in enumerate(image_prompts, 1):
-                try:
-                    image_path = self._generate_image_from_prompt(prompt, i)
-                    temp_image_files.append(image_path)
-                except Exception as e:
-                    print(f"Failed to generate image for section {i}: {e}")
-                    continue
+            # Step 2: Generate images for each section
+            logger.info("Step 2: Generating images for each section...")
+            temp_image_files.extend(self.generate_images(image_prompts))
             
             if not temp_image_files:
                 return "Error: No images were successfully generated"
             
-            if len(temp_image_files) != 36:
-                print(f"Warning: Only {len(temp_image_files)} images generated instead of 36")
-            
-            # Step 4: Create synchronized video (video only)
-            print("Step 4: Creating synchronized video...")
-            video_path = self._create_synchronized_video(temp_image_files, audio_duration)
-            
-            return video_path
+            # Step 3: Create synchronized video (with narration when embed_audio is set)
+            logger.info("Step 3: Creating synchronized video...")
+            return self.render_video(temp_image_files, audio_file_path)
             
         except Exception as e:
             error_msg = f"Error in video generation process: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             return error_msg
             
         finally:
-            # Clean up temporary image files
-            for image_file in temp_image_files:
-                try:
-                    os.unlink(image_file)
-                    print(f"Cleaned up temporary file: {image_file}")
-                except OSError as e:
-                    print(f"Error cleaning up file {image_file}: {e}")
+            # Clean up temporary image files; resumable runs keep them until their owner is done
+            if not self.resume_images:
+                self.cleanup_images(temp_image_files)
@@ -0,0 +1,155 @@
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Optional, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled."""
+
+
+class Job:
+    """State of one queued video generation; updated by the worker, read by the UI."""
+
+    def __init__(self, job_id: str, params: Dict[str, Any]):
+        self.id = job_id
+        self.params = params
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result: Any = None
+        self.artifacts: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def report(self, stage: str, progress: float) -> None:
+        """Progress callback handed to the pipeline; also the cancellation checkpoint."""
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+        with self._lock:
+            self.stage = stage
+            self.progress = max(self.progress, progress)
+
+    def publish(self, name: str, value: Any) -> None:
+        """Callback handed to the pipeline for intermediate artifacts (e.g. a preview) shown before the result."""
+        with self._lock:
+            self.artifacts[name] = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Consistent copy of the job state for display."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "params": dict(self.params),
+                "status": self.status,
+                "stage": self.stage,
+                "progress": self.progress,
+                "result": self.result,
+                "artifacts": dict(self.artifacts),
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobQueue:
+    """
+    Local job queue backed by a fixed-size worker pool.
+
+    Jobs beyond max_workers wait in the executor's queue, so the host never runs
+    more pipelines at once than configured no matter how many sessions submit.
+    Finished jobs are kept for retention_seconds so a reconnecting browser can
+    pick up the result by job ID. The runner is called with the job's params plus
+    progress, publish and cancelled callbacks.
+    """
+
+    def __init__(self, runner: Callable[..., Any], max_workers: int = 2, retention_seconds: float = 3600):
+        self.runner = runner
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="video-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, **params) -> str:
+        """
+        Queue a job; params are passed to the runner along with a progress callback.
+
+        Returns:
+            str: The job ID
+        """
+        self._prune()
+        job = Job(uuid.uuid4().hex, params)
+        with self._lock:
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._execute, job)
+        return job.id
+
+    def _execute(self, job: Job) -> None:
+        if job.cancel_event.is_set():
+            return
+        with job._lock:
+            job.status = "running"
+            job.started_at = time.time()
+        try:
+            result = self.runner(**job.params, progress=job.report, publish=job.publish,
+                                 cancelled=job.cancel_event.is_set)
+            with job._lock:
+                job.result = result
+                job.status = "done"
+                job.stage = "done"
+                job.progress = 1.0
+        except JobCancelled:
+            with job._lock:
+                job.status = "cancelled"
+        except Exception as e:
+            logger.exception("Job %s failed: %s", job.id, e)
+            with job._lock:
+                job.status = "failed"
+                job.error = str(e)
+        finally:
+            with job._lock:
+                job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job, or None if it is unknown or has been pruned."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.snapshot() if job else None
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job. Queued jobs never start; running jobs stop at the next stage boundary.
+
+        Returns:
+            bool: Whether the job existed and was still cancellable
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.status in ("done", "failed", "cancelled"):
+            return False
+        job.cancel_event.set()
+        if job.future and job.future.cancel():
+            with job._lock:
+                job.status = "cancelled"
+                job.finished_at = time.time()
+        return True
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job.finished_at and job.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
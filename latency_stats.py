@@ -0,0 +1,45 @@
+import math
+import threading
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+
+def percentile(values: Iterable[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0-100) of the values, or None when there are none."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(values: Iterable[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99 of a set of latencies in seconds."""
+    values = list(values)
+    return {"p50": percentile(values, 50), "p95": percentile(values, 95), "p99": percentile(values, 99)}
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent request latencies shared by concurrent callers.
+
+    Used to derive hedging thresholds from what the backend has actually been
+    doing lately rather than from a fixed guess.
+    """
+
+    def __init__(self, window: int = 500):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples)
+        return percentile(samples, q)
@@ -0,0 +1,295 @@
+import os
+import re
+import time
+import shutil
+import logging
+import secrets
+import mimetypes
+import threading
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit, parse_qs
+
+logger = logging.getLogger(__name__)
+
+MEDIA_STORE_DIR = os.getenv("MEDIA_STORE_DIR", os.path.join("cache", "media"))
+MEDIA_TTL_SECONDS = float(os.getenv("MEDIA_TTL_SECONDS", 4 * 3600))
+# Loopback only by default; set MEDIA_HOST=0.0.0.0 to serve other machines
+MEDIA_HOST = os.getenv("MEDIA_HOST", "127.0.0.1")
+MEDIA_PORT = int(os.getenv("MEDIA_PORT", 8502))
+# URL the browser uses to reach the media server (differs from MEDIA_HOST behind a proxy).
+# No default: only the deployment knows an address every viewer can reach, so without it
+# the app plays files through Streamlit and the media server is not started.
+MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "").rstrip("/")
+# Comma-separated page origins allowed to fetch media cross-origin (the Streamlit app by default)
+_APP_PORT = os.getenv("STREAMLIT_SERVER_PORT", "8501")
+MEDIA_ALLOWED_ORIGINS = frozenset(
+    origin.strip().rstrip("/")
+    for origin in os.getenv("MEDIA_ALLOWED_ORIGINS", f"http://localhost:{_APP_PORT},http://127.0.0.1:{_APP_PORT}").split(",")
+    if origin.strip()
+)
+
+COPY_CHUNK_BYTES = 256 * 1024
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+mimetypes.add_type("text/vtt", ".vtt")
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/mp2t", ".ts")
+
+
+class MediaStore:
+    """
+    On-disk artifacts addressed by opaque handles.
+
+    Sessions keep only the handle; the bytes stay on disk and are streamed by the
+    media server. Each artifact is hard-linked (or copied across filesystems) into
+    the store so cache eviction elsewhere cannot pull it from under a player, and
+    handles not touched for ttl_seconds are expired together with their files.
+
+    A directory can be registered too (a growing HLS playlist and its segments):
+    it is served in place, by name relative to the handle, and never deleted here.
+    """
+
+    def __init__(self, root: str = MEDIA_STORE_DIR, ttl_seconds: float = MEDIA_TTL_SECONDS):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Dict[str, object]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        # Files left by a previous process have no handles pointing at them
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def add(self, path: str, filename: Optional[str] = None) -> str:
+        """
+        Register a file and return its handle.
+
+        Args:
+            path: Path of the artifact to serve
+            filename: Name offered for downloads (defaults to the file's basename)
+
+        Returns:
+            str: The handle
+        """
+        self.expire()
+        handle = secrets.token_urlsafe(16)
+        extension = os.path.splitext(path)[1]
+        stored_path = os.path.join(self.root, handle + extension)
+        try:
+            os.link(path, stored_path)
+        except OSError:
+            shutil.copyfile(path, stored_path)
+        with self._lock:
+            self._entries[handle] = {
+                "path": stored_path,
+                "filename": filename or os.path.basename(path),
+                "mime": mimetypes.guess_type(path)[0] or "application/octet-stream",
+                "last_access": time.time(),
+            }
+        return handle
+
+    def add_directory(self, directory: str, index_name: str) -> str:
+        """
+        Register a directory whose files are still being written and return its handle.
+
+        Args:
+            directory: Directory to serve (e.g. an HLS playlist with its segments)
+            index_name: File the handle's URL points at (e.g. playlist.m3u8)
+
+        Returns:
+            str: The handle
+        """
+        self.expire()
+        handle = secrets.token_urlsafe(16)
+        with self._lock:
+            self._entries[handle] = {
+                "directory": os.path.abspath(directory),
+                "path": None,
+                "filename": index_name,
+                "mime": None,
+                "last_access": time.time(),
+            }
+        return handle
+
+    def lookup(self, handle: str, name: Optional[str] = None) -> Optional[Tuple[str, str, str]]:
+        """
+        (path, filename, mime type) for a live handle, refreshing its expiry; None otherwise.
+
+        For directory handles, name selects the file inside the directory (the index by default).
+        """
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                return None
+            entry["last_access"] = time.time()
+            if entry["path"] is not None:
+                return entry["path"], entry["filename"], entry["mime"]
+            directory = entry["directory"]
+            name = name or entry["filename"]
+        # Only plain names inside the directory; no separators or parent references
+        if name != os.path.basename(name) or name in (".", ".."):
+            return None
+        return (os.path.join(directory, name), name,
+                mimetypes.guess_type(name)[0] or "application/octet-stream")
+
+    def url(self, handle: str, download: bool = False) -> str:
+        """Browser URL for a handle; download=True asks the browser to save instead of play."""
+        if not MEDIA_BASE_URL:
+            raise RuntimeError("MEDIA_BASE_URL is not set, so the media server has no public URL")
+        with self._lock:
+            entry = self._entries.get(handle)
+        filename = quote(entry["filename"]) if entry else "media"
+        return f"{MEDIA_BASE_URL}/media/{handle}/{filename}" + ("?download=1" if download else "")
+
+    def expire(self) -> int:
+        """
+        Drop handles idle for longer than the TTL and delete their files.
+
+        Returns:
+            int: Number of expired handles
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [handle for handle, entry in self._entries.items() if entry["last_access"] < cutoff]
+            paths = [self._entries.pop(handle)["path"] for handle in expired]
+        for path in filter(None, paths):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if expired:
+            logger.info("Expired %d media handles", len(expired))
+        return len(expired)
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single-range header; None if unsatisfiable or unsupported."""
+    match = _RANGE_RE.match(header.strip())
+    if not match or size == 0:
+        return None
+    start, end = match.groups()
+    if not start:
+        # Suffix range: the last N bytes
+        if not end:
+            return None
+        length = min(int(end), size)
+        return (size - length, size - 1) if length else None
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return None
+    return start, end
+
+
+class MediaRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves GET/HEAD /media/<handle>/<filename> with single-range (206) support.
+
+    For directory handles the filename picks the file, so an HLS playlist's
+    relative segment URLs resolve next to it.
+    """
+
+    store: MediaStore = None
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body: bool) -> None:
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        found = None
+        if len(parts) >= 2 and parts[0] == "media":
+            found = self.store.lookup(parts[1], unquote(parts[2]) if len(parts) == 3 else None)
+        if found is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        path, filename, mime = found
+
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            start, end = 0, size - 1
+            status = HTTPStatus.OK
+            range_header = self.headers.get("Range")
+            if range_header:
+                byte_range = _parse_range(range_header, size)
+                if byte_range is None:
+                    self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                start, end = byte_range
+                status = HTTPStatus.PARTIAL_CONTENT
+
+            length = max(0, end - start + 1)
+            self.send_response(status)
+            self.send_header("Content-Type", mime)
+            self.send_header("Content-Length", str(length))
+            self.send_header("Accept-Ranges", "bytes")
+            # Subtitle tracks and HLS segments are fetched cross-origin from the Streamlit page
+            origin = self.headers.get("Origin")
+            if origin and origin in MEDIA_ALLOWED_ORIGINS:
+                self.send_header("Access-Control-Allow-Origin", origin)
+            self.send_header("Vary", "Origin")
+            # A live playlist changes with every new segment, so players must re-fetch it
+            cache_control = "no-cache" if mime == "application/vnd.apple.mpegurl" else "private, max-age=3600"
+            self.send_header("Cache-Control", cache_control)
+            if status == HTTPStatus.PARTIAL_CONTENT:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            if "download" in parse_qs(url.query):
+                self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(filename)}")
+            self.end_headers()
+            if not send_body:
+                return
+
+            f.seek(start)
+            remaining = length
+            try:
+                while remaining > 0:
+                    data = f.read(min(COPY_CHUNK_BYTES, remaining))
+                    if not data:
+                        break
+                    self.wfile.write(data)
+                    remaining -= len(data)
+            except (BrokenPipeError, ConnectionResetError):
+                # Players routinely abort a request when seeking
+                pass
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def start_media_server(store: MediaStore, host: str = MEDIA_HOST, port: int = MEDIA_PORT) -> ThreadingHTTPServer:
+    """
+    Serve the store over HTTP from a daemon thread and expire idle handles periodically.
+
+    Returns:
+        ThreadingHTTPServer: The running server (call shutdown() to stop it)
+    """
+    if not MEDIA_BASE_URL:
+        raise RuntimeError("Set MEDIA_BASE_URL to the address browsers use to reach the media server")
+    handler = type("BoundMediaRequestHandler", (MediaRequestHandler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="media-server", daemon=True).start()
+
+    def sweep():
+        while True:
+            time.sleep(max(60.0, store.ttl_seconds / 4))
+            store.expire()
+
+    threading.Thread(target=sweep, name="media-expiry", daemon=True).start()
+    logger.info("Media server listening on %s:%d (public URL %s)", host, port, MEDIA_BASE_URL)
+    return server
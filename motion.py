@@ -0,0 +1,277 @@
+import os
+import logging
+from fractions import Fraction
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from frame_pipeline import FRAME_BUFFER, FRAME_WORKERS, encode_raw_frames, iter_frames
+
+logger = logging.getLogger(__name__)
+
+MOTION_FPS = int(os.getenv("MOTION_FPS", 24))
+CROSSFADE_SECONDS = float(os.getenv("CROSSFADE_SECONDS", 1.0))
+# Largest zoom of the pan/zoom move; 1.12 crops at most ~11% of each side
+MAX_ZOOM = float(os.getenv("MOTION_MAX_ZOOM", 1.12))
+# Frames composited into one reused buffer and handed to the encoder in a single write
+MOTION_BATCH = int(os.getenv("MOTION_BATCH", 8))
+# Compositing budget at 1280x720: frames produced per CPU-second of the compositing process,
+# crossfades included. benchmarks/bench_motion.py measures it and fails when a render falls below.
+FPS_PER_CORE_BUDGET = 40.0
+
+# Blend weights are 8-bit fixed point so every multiply stays in uint16
+_ONE = np.uint16(256)
+
+
+def _smoothstep(t: np.ndarray) -> np.ndarray:
+    return t * t * (3 - 2 * t)
+
+
+class MotionPlan:
+    """
+    Per-frame crop windows and crossfade weights for a whole slideshow.
+
+    Everything that depends on time is computed up front as arrays, one row per
+    output frame: which scene (and, during a crossfade, which second scene) is
+    visible, the blend weight of the second scene, and the source-pixel crop
+    window (x, y, width, height) of each. Scene i's pan/zoom runs over its
+    whole visible span, including the crossfades on either side, so motion
+    never stops while two scenes overlap.
+    """
+
+    def __init__(self, durations: List[float], source_size: Tuple[int, int], fps: int = MOTION_FPS,
+                 crossfade: float = CROSSFADE_SECONDS, max_zoom: float = MAX_ZOOM, seed: int = 0):
+        if not durations:
+            raise ValueError("No scenes to plan")
+        self.fps = fps
+        self.source_size = source_size
+        boundaries = np.round(np.concatenate([[0.0], np.cumsum(durations)]) * fps).astype(np.int64)
+        scene_frames = np.diff(boundaries)
+        if scene_frames.min() < 1:
+            raise ValueError("Every scene must last at least one frame")
+        self.frame_count = int(boundaries[-1])
+        # A crossfade may not be longer than the scenes it joins
+        fade = int(min(round(crossfade * fps), scene_frames.min())) if len(durations) > 1 else 0
+        lead = fade // 2
+        self.crossfade_frames = fade
+
+        count = len(durations)
+        frames = np.arange(self.frame_count)
+        scene = np.searchsorted(boundaries[1:-1], frames, side="right")
+        fade_start = boundaries[1:-1] - lead  # first frame of the fade into scene k + 1
+        into_next = np.zeros(self.frame_count, dtype=bool)
+        from_previous = np.zeros(self.frame_count, dtype=bool)
+        if fade:
+            into_next = (scene < count - 1) & (frames >= fade_start[np.minimum(scene, count - 2)])
+            from_previous = (scene > 0) & (frames < fade_start[np.maximum(scene - 1, 0)] + fade)
+
+        self.scene_a = np.where(from_previous, scene - 1, scene).astype(np.int32)
+        self.scene_b = np.where(into_next, scene + 1, np.where(from_previous, scene, -1)).astype(np.int32)
+        blending = self.scene_b >= 0
+        start = np.where(blending, fade_start[np.maximum(self.scene_b - 1, 0)], 0)
+        self.weight_b = np.where(blending, np.round((frames - start + 1) / (fade + 1) * _ONE), 0).astype(np.uint16)
+
+        # Visible span of each scene, fades included, drives its motion progress
+        span_start = np.concatenate([[0], fade_start])
+        span_end = np.concatenate([fade_start + fade, [self.frame_count]])
+        params = self._scene_moves(count, max_zoom, seed)
+        self.window_a = self._windows(self.scene_a, frames, span_start, span_end, params)
+        self.window_b = self._windows(np.maximum(self.scene_b, 0), frames, span_start, span_end, params)
+
+    def _scene_moves(self, count: int, max_zoom: float, seed: int) -> np.ndarray:
+        """(zoom_start, zoom_end, u_x0, u_y0, u_x1, u_y1) per scene; u in [-1, 1] spans the pan range."""
+        rng = np.random.default_rng(seed)
+        params = np.empty((count, 6), dtype=np.float64)
+        zoom_in = np.arange(count) % 2 == 0
+        params[:, 0] = np.where(zoom_in, 1.0, max_zoom)
+        params[:, 1] = np.where(zoom_in, max_zoom, 1.0)
+        params[:, 2:] = rng.uniform(-1.0, 1.0, size=(count, 4))
+        return params
+
+    def _windows(self, scenes: np.ndarray, frames: np.ndarray, span_start: np.ndarray, span_end: np.ndarray,
+                 params: np.ndarray) -> np.ndarray:
+        width, height = self.source_size
+        length = np.maximum(span_end[scenes] - span_start[scenes] - 1, 1)
+        t = _smoothstep(np.clip((frames - span_start[scenes]) / length, 0.0, 1.0))
+        move = params[scenes]
+        zoom = move[:, 0] + (move[:, 1] - move[:, 0]) * t
+        crop_w, crop_h = width / zoom, height / zoom
+        # Pan between two anchor points, kept inside the image at the current zoom
+        half_x, half_y = (width - crop_w) / 2, (height - crop_h) / 2
+        center_x = width / 2 + (move[:, 2] + (move[:, 4] - move[:, 2]) * t) * half_x
+        center_y = height / 2 + (move[:, 3] + (move[:, 5] - move[:, 3]) * t) * half_y
+        return np.stack([center_x - crop_w / 2, center_y - crop_h / 2, crop_w, crop_h], axis=1).astype(np.float32)
+
+
+def _sample_axis(start: float, extent: float, out_size: int, source_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Left source index and 8-bit weight of the right neighbour for every output pixel along one axis."""
+    coords = start + (np.arange(out_size, dtype=np.float32) + 0.5) * (extent / out_size) - 0.5
+    coords = np.clip(coords, 0, source_size - 1)
+    index = np.minimum(coords.astype(np.int64), source_size - 2)
+    weight = np.round((coords - index) * _ONE).astype(np.uint16)
+    return index, weight
+
+
+def to_rgbx(frame: bytes, size: Tuple[int, int]) -> np.ndarray:
+    """Repack an rgb24 frame as one uint32 per pixel (R, G, B, 0 in memory order)."""
+    width, height = size
+    rgbx = np.zeros((height, width, 4), np.uint8)
+    rgbx[..., :3] = np.frombuffer(frame, np.uint8).reshape(height, width, 3)
+    return rgbx.view(np.uint32).reshape(height, width)
+
+
+class FrameCompositor:
+    """
+    Bilinear crop-and-scale plus crossfade into preallocated buffers.
+
+    Frames are held as one uint32 per pixel (rgb0), so gathering a pixel is a
+    single word copy instead of three byte copies. Resampling is separable:
+    gather two source rows per output row and blend them in 8-bit fixed point,
+    then gather two columns per output column and blend those. Every step is a
+    whole-frame NumPy operation writing into scratch arrays allocated once, so
+    a frame costs a fixed number of vectorized passes and no allocation.
+    """
+
+    def __init__(self, source_size: Tuple[int, int], size: Tuple[int, int]):
+        source_w, source_h = source_size
+        width, height = size
+        self.source_size = source_size
+        self.size = size
+        self._rows = (np.empty((height, source_w), np.uint32), np.empty((height, source_w), np.uint32))
+        self._vertical = (np.empty((height, source_w * 4), np.uint16), np.empty((height, source_w * 4), np.uint16))
+        self._packed = np.empty((height, source_w), np.uint32)
+        self._cols = (np.empty((height, width), np.uint32), np.empty((height, width), np.uint32))
+        self._horizontal = (np.empty((height, width * 4), np.uint16), np.empty((height, width * 4), np.uint16))
+        self._second = np.empty((height, width), np.uint32)
+
+    @staticmethod
+    def _lerp(first: np.ndarray, second: np.ndarray, weight: np.ndarray, scratch: Tuple[np.ndarray, np.ndarray],
+              out: np.ndarray) -> None:
+        """out = (first * (256 - weight) + second * weight) >> 8 over the bytes of packed pixels."""
+        low, high = scratch
+        np.multiply(first.view(np.uint8).reshape(low.shape), _ONE - weight, out=low)
+        np.multiply(second.view(np.uint8).reshape(low.shape), weight, out=high)
+        low += high
+        low >>= 8
+        np.copyto(out.view(np.uint8).reshape(low.shape), low, casting="unsafe")
+
+    def crop(self, source: np.ndarray, window: np.ndarray, out: np.ndarray) -> np.ndarray:
+        """Resample the source's (x, y, w, h) window to the output size into out."""
+        source_w, source_h = self.source_size
+        width, height = self.size
+        x, y, w, h = (float(v) for v in window)
+        row, row_weight = _sample_axis(y, h, height, source_h)
+        col, col_weight = _sample_axis(x, w, width, source_w)
+
+        # mode="clip" lets take write straight into out; the indices are already in range
+        top, bottom = self._rows
+        np.take(source, row, axis=0, out=top, mode="clip")
+        np.take(source, row + 1, axis=0, out=bottom, mode="clip")
+        self._lerp(top, bottom, row_weight[:, None], self._vertical, self._packed)
+
+        left, right = self._cols
+        np.take(self._packed, col, axis=1, out=left, mode="clip")
+        np.take(self._packed, col + 1, axis=1, out=right, mode="clip")
+        self._lerp(left, right, np.repeat(col_weight, 4)[None, :], self._horizontal, out)
+        return out
+
+    def blend(self, first: np.ndarray, second: np.ndarray, weight: int, out: np.ndarray) -> np.ndarray:
+        """Crossfade: out = first * (1 - weight / 256) + second * weight / 256."""
+        self._lerp(first, second, np.uint16(weight), self._horizontal, out)
+        return out
+
+    def render(self, plan: MotionPlan, sources: Dict[int, np.ndarray], frame: int, out: np.ndarray) -> np.ndarray:
+        """Composite one planned frame from the decoded scenes it needs into out."""
+        self.crop(sources[int(plan.scene_a[frame])], plan.window_a[frame], out)
+        scene_b = int(plan.scene_b[frame])
+        if scene_b >= 0:
+            self.crop(sources[scene_b], plan.window_b[frame], self._second)
+            self.blend(out, self._second, int(plan.weight_b[frame]), out)
+        return out
+
+
+def iter_motion_frames(plan: MotionPlan, sources: Iterator[bytes], size: Tuple[int, int],
+                       batch: int = MOTION_BATCH) -> Iterator[memoryview]:
+    """
+    Yield the planned video as batches of packed rgb0 frames.
+
+    Decoded rgb24 scenes are pulled from `sources` (in scene order) only when the
+    plan first needs them and dropped once no later frame uses them, so at most
+    two scenes are held. Each batch is a view of one reused buffer and is only
+    valid until the next batch is requested.
+    """
+    width, height = size
+    compositor = FrameCompositor(plan.source_size, size)
+    buffer = np.empty((batch, height, width), np.uint32)
+    decoded: Dict[int, np.ndarray] = {}
+    next_scene = 0
+
+    filled = 0
+    for frame in range(plan.frame_count):
+        needed = int(max(plan.scene_a[frame], plan.scene_b[frame]))
+        while next_scene <= needed:
+            decoded[next_scene] = to_rgbx(next(sources), plan.source_size)
+            next_scene += 1
+        for scene in [s for s in decoded if s < plan.scene_a[frame]]:
+            del decoded[scene]
+        compositor.render(plan, decoded, frame, buffer[filled])
+        filled += 1
+        if filled == batch:
+            yield memoryview(buffer).cast("B")
+            filled = 0
+    if filled:
+        yield memoryview(buffer[:filled]).cast("B")
+
+
+def render_motion(
+    image_paths: List[str],
+    durations: List[float],
+    output_path: str,
+    audio_path: Optional[str] = None,
+    size: Tuple[int, int] = (1280, 720),
+    fps: int = MOTION_FPS,
+    crossfade: float = CROSSFADE_SECONDS,
+    max_zoom: float = MAX_ZOOM,
+    preset: str = "medium",
+    crf: int = 23,
+    workers: int = FRAME_WORKERS,
+    buffer_frames: int = FRAME_BUFFER,
+) -> str:
+    """
+    Encode a slideshow with slow pan/zoom on every scene and crossfades between them.
+
+    Scene images are decoded once in worker processes (frame_pipeline.iter_frames),
+    every frame's crop window and blend weight come from a precomputed MotionPlan,
+    and frames are composited in batches by FrameCompositor and piped to ffmpeg.
+
+    Args:
+        image_paths: Images in display order
+        durations: Display duration in seconds for each image
+        output_path: Path of the MP4 to write
+        audio_path: Optional narration to mux in during the same encode
+        size: (width, height) of the output; scenes are decoded at this size
+        fps: Output frame rate
+        crossfade: Crossfade length in seconds (0 for hard cuts)
+        max_zoom: Largest zoom factor of the pan/zoom move (1.0 disables it)
+        preset: libx264 preset
+        crf: libx264 constant rate factor
+        workers: Decode processes (1 decodes in this process)
+        buffer_frames: Maximum decoded scenes held ahead of the compositor
+
+    Returns:
+        str: Absolute path of the rendered video
+    """
+    if not image_paths:
+        raise ValueError("No images to render")
+    if len(image_paths) != len(durations):
+        raise ValueError("image_paths and durations must have the same length")
+
+    plan = MotionPlan(durations, size, fps=fps, crossfade=crossfade, max_zoom=max_zoom)
+    logger.debug("Compositing %d frames for %d scenes (%d-frame crossfades)",
+                 plan.frame_count, len(image_paths), plan.crossfade_frames)
+    sources = iter_frames(image_paths, size, workers, buffer_frames)
+    try:
+        return encode_raw_frames(iter_motion_frames(plan, sources, size), size, Fraction(fps), output_path,
+                                 audio_path=audio_path, preset=preset, crf=crf, pixel_format="rgb0")
+    finally:
+        sources.close()
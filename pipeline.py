@@ -0,0 +1,464 @@
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Callable, Any, Optional
+from pydantic import BaseModel, Field
+from crew import story_crew, video_tool
+from workspace import Workspace, sweep_workspaces
+from checkpoint import RunCheckpoint
+from video_processing import generate_vtt, generate_vtt_from_chunks, clean_subtitle_text, combine_audio_video
+from audio_manifest import read_audio_manifest, audio_duration
+from result_cache import result_cache
+from slideshow_renderer import render_slideshow
+from hls_output import HlsWriter
+from frame_pipeline import IMAGE_SIZE
+from clients import registry
+import text_to_speech
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a change makes previously cached videos stale
+PIPELINE_VERSION = "1"
+
+# Rough share of a run completed when each stage starts, for progress reporting
+STAGE_PROGRESS = {
+    "research_and_writing": 0.05,
+    "tts": 0.3,
+    "scene_planning": 0.3,
+    "images": 0.4,
+    "render": 0.85,
+    "mux": 0.93,
+    "subtitles": 0.95,
+}
+
+# Encodes are CPU bound; cap how many run at once across all jobs in this process
+render_slots = threading.BoundedSemaphore(int(os.getenv("MAX_CONCURRENT_RENDERS", 1)))
+# How often a segment waiting for a render slot checks whether streaming was stopped
+SLOT_POLL_SECONDS = 0.2
+
+# Draft shown while the full-quality video is still being produced
+PREVIEW_SCENES = int(os.getenv("PREVIEW_SCENES", 6))
+PREVIEW_SIZE = (640, 360)
+# Stream the video as per-scene HLS segments while it is produced (instead of the draft preview)
+STREAM_SEGMENTS = os.getenv("STREAM_SEGMENTS", "1") == "1"
+
+_run_locks: Dict[str, threading.Lock] = {}
+_run_locks_guard = threading.Lock()
+
+
+class PipelineResult(BaseModel):
+    """Artifacts and timings of one pipeline run."""
+    story_text: str = Field(..., description="Story produced by the writer agent")
+    preview_path: Optional[str] = Field(default=None, description="Path of the low-resolution draft video, when one was rendered")
+    playlist_path: Optional[str] = Field(default=None, description="Path of the HLS playlist of per-scene segments, when streamed")
+    audio_path: Optional[str] = Field(default=None, description="Path of the narration WAV (None for cached results)")
+    video_path: str = Field(..., description="Path of the final video with narration")
+    subtitles_path: str = Field(..., description="Path of the WebVTT subtitles")
+    cached: bool = Field(default=False, description="Whether the result was served from the result cache")
+    stage_timings: Dict[str, Dict[str, float]] = Field(
+        default_factory=dict,
+        description="Per-stage start/end/duration in seconds, relative to the start of the run"
+    )
+    critical_path: List[str] = Field(default_factory=list, description="Stages on the critical path")
+    total_seconds: float = Field(default=0.0, description="Wall-clock time of the whole run")
+    trace: Optional[Dict[str, Any]] = Field(default=None, description="Exported span trace of the run, when tracing is enabled")
+
+
+class StageTimer:
+    """Records start/end offsets of named stages; safe to use from several threads."""
+
+    def __init__(self, progress: Optional[Callable[[str, float], None]] = None):
+        self.origin = time.perf_counter()
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.progress = progress
+        self._lock = threading.Lock()
+
+    def run(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        if self.progress:
+            # May raise to cancel the run before the stage starts
+            self.progress(name, STAGE_PROGRESS.get(name, 0.0))
+        start = time.perf_counter() - self.origin
+        try:
+            with tracing.span(name):
+                return fn(*args, **kwargs)
+        finally:
+            end = time.perf_counter() - self.origin
+            with self._lock:
+                self.timings[name] = {"start": start, "end": end, "duration": end - start}
+            logger.info("%s finished in %.2fs", name, end - start)
+
+
+def _write_story(topic: str, language: str, checkpoint: RunCheckpoint) -> str:
+    # kickoff() interpolates the inputs into the crew's agents and tasks in place,
+    # so concurrent jobs each run their own copy instead of the shared crew
+    story_result = story_crew.copy().kickoff(inputs={"topic": topic, "language": language})
+    if story_result.tasks_output:
+        checkpoint.write_text("research.txt", story_result.tasks_output[0].raw)
+    return checkpoint.write_text("story.txt", story_result.raw)
+
+
+def _narrate(story_text: str, output_dir: str) -> str:
+    audio_path = text_to_speech.MyCustomTool(output_dir=output_dir).run(text=story_text)
+    if audio_path.startswith("Failed"):
+        raise RuntimeError(audio_path)
+    return audio_path
+
+
+def _write_subtitles(story_text: str, audio_path: str, subtitles_path: str) -> str:
+    manifest = read_audio_manifest(audio_path)
+    if manifest:
+        vtt_content = generate_vtt_from_chunks(manifest["chunks"])
+    else:
+        vtt_content = generate_vtt(clean_subtitle_text(story_text), audio_duration(audio_path))
+    with open(subtitles_path, "w", encoding="utf-8") as f:
+        f.write(vtt_content)
+    return os.path.abspath(subtitles_path)
+
+
+def _render_preview(image_paths: List[str], audio_path: str, output_path: str) -> str:
+    # Small, fast encode: a handful of scenes at 360p with the ultrafast preset
+    duration = audio_duration(audio_path)
+    render_slideshow(image_paths, [duration / len(image_paths)] * len(image_paths), output_path,
+                     audio_path=audio_path, size=PREVIEW_SIZE, preset="ultrafast", crf=30)
+    return os.path.abspath(output_path)
+
+
+def _render(tool, image_paths: List[str], audio_path: str) -> str:
+    with render_slots:
+        return tool.render_video(image_paths, audio_path)
+
+
+def run_pipeline(topic: str, language: str, workspace: Workspace, style: Optional[str] = None,
+                 overlapped: bool = True,
+                 progress: Optional[Callable[[str, float], None]] = None,
+                 preview: Optional[Callable[[str, str], None]] = None,
+                 segments: Optional[Callable[[str, str], None]] = None,
+                 cancelled: Optional[Callable[[], bool]] = None) -> PipelineResult:
+    """
+    Research and write the story, then produce narration, visuals and subtitles.
+
+    Once the story exists, TTS synthesis and the scene-planning + image stage
+    only depend on the story text, so in overlapped mode they run at the same
+    time and only the final render waits for the narration.
+
+    Every stage checkpoints its result in the workspace (story, narration and
+    manifest, scene plan, one file per scene image, video), so running again
+    with the same workspace after a failure resumes at the first incomplete
+    stage instead of repeating finished API calls.
+
+    With a preview callback (overlapped mode only), a low-resolution draft of
+    the first PREVIEW_SCENES finished scenes is rendered as soon as the
+    narration exists and handed over while the full render is still pending.
+    It uses the same narration and subtitles as the final video.
+
+    With a segments callback (overlapped mode only), every scene is also encoded
+    as a short HLS segment carrying its span of the narration, in scene order,
+    as soon as its image and the narration exist, and appended to an EVENT
+    playlist in the workspace. The callback receives the playlist after the
+    first segment, so playback starts while later images are still generated;
+    the playlist is closed once the last scene is in. Streaming stops as soon as
+    the final video exists, the run fails or the run is cancelled, and the
+    result never waits for outstanding segments. Segment encodes share the
+    render_slots limit with the final render.
+
+    Args:
+        topic: Figure to tell the story of
+        language: Narration language
+        workspace: Directory that receives every file this run writes and its checkpoints
+        style: Optional visual style for the scene images
+        overlapped: Run TTS and visuals concurrently (False runs them one after another)
+        progress: Optional callback(stage, fraction) invoked as each stage starts; raising from it aborts the run
+        preview: Optional callback(video_path, subtitles_path) receiving the draft video
+        segments: Optional callback(playlist_path, subtitles_path) receiving the growing HLS playlist
+        cancelled: Optional callable returning True once the run has been cancelled; checked between segments
+
+    Returns:
+        PipelineResult: Story, audio and video paths plus per-stage timings
+    """
+    timer = StageTimer(progress)
+    checkpoint = RunCheckpoint(workspace.root)
+    # Per-run copy of the shared tool so its files land in this run's workspace;
+    # scene images are kept under stable names so a retry only fetches the missing ones
+    run_video_tool = video_tool.model_copy(update={"output_dir": workspace.root, "resume_images": True})
+
+    def stage(name: str, fn: Callable, *args) -> Any:
+        return timer.run(name, checkpoint.resume, name, fn, *args)
+
+    stage("research_and_writing", _write_story, topic, language, checkpoint)
+    story_text = checkpoint.read_text("story.txt")
+
+    # Scene images as they finish (and the planned scene count), for the draft and the segments
+    ready_images: Dict[int, str] = {}
+    planned_scenes: List[int] = []
+    images_ready = threading.Condition()
+
+    def on_image(scene_number: int, image_path: str) -> None:
+        with images_ready:
+            ready_images[scene_number] = image_path
+            images_ready.notify_all()
+
+    def wake_draft() -> None:
+        with images_ready:
+            images_ready.notify_all()
+
+    # Set once the final render is due (or the run ended without one): segments are no longer worth encoding
+    stop_streaming = threading.Event()
+
+    def streaming_stopped() -> bool:
+        return stop_streaming.is_set() or bool(cancelled and cancelled())
+
+    def visuals() -> List[str]:
+        # Prompts flow to the image stage while the planner's response is still streaming
+        scene_queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        streamed: List[str] = []
+
+        def on_scene(prompt: str) -> None:
+            streamed.append(prompt)
+            scene_queue.put(prompt)
+
+        def plan() -> None:
+            try:
+                prompts = stage("scene_planning", run_video_tool.plan_scenes, story_text, style, on_scene)
+                # A plan restored from its checkpoint arrives all at once
+                for prompt in prompts[len(streamed):]:
+                    scene_queue.put(prompt)
+                with images_ready:
+                    planned_scenes.append(len(prompts))
+                    images_ready.notify_all()
+            finally:
+                scene_queue.put(None)
+
+        with ThreadPoolExecutor(max_workers=1) as planner:
+            plan_future = planner.submit(tracing.propagate(plan))
+            # Not checkpointed as a whole: every finished scene image is its own checkpoint
+            image_paths = timer.run("images", run_video_tool.generate_images, iter(scene_queue.get, None), on_image)
+            plan_future.result()
+        return image_paths
+
+    def draft(audio_future, visuals_future) -> Optional[str]:
+        audio_path = audio_future.result()
+        # Written once here and restored from the checkpoint by the final subtitles stage
+        subtitles_path = checkpoint.resume("subtitles", _write_subtitles, story_text, audio_path,
+                                           workspace.path("subtitles.vtt"))
+        visuals_future.add_done_callback(lambda _: wake_draft())
+        with images_ready:
+            images_ready.wait_for(lambda: len(ready_images) >= PREVIEW_SCENES or visuals_future.done())
+            scenes = [ready_images[n] for n in sorted(ready_images)][:PREVIEW_SCENES]
+        if not scenes or visuals_future.done():
+            # The full render is about to start anyway
+            return None
+        with tracing.span("preview", scenes=len(scenes)):
+            start = time.perf_counter()
+            preview_path = _render_preview(scenes, audio_path, workspace.path("preview.mp4"))
+        logger.info("preview of %d scenes rendered in %.2fs", len(scenes), time.perf_counter() - start)
+        preview(preview_path, subtitles_path)
+        return preview_path
+
+    def stream(audio_future, visuals_future) -> Optional[str]:
+        audio_path = audio_future.result()
+        subtitles_path = checkpoint.resume("subtitles", _write_subtitles, story_text, audio_path,
+                                           workspace.path("subtitles.vtt"))
+        visuals_future.add_done_callback(lambda _: wake_draft())
+        with images_ready:
+            images_ready.wait_for(lambda: planned_scenes or visuals_future.done() or stop_streaming.is_set())
+        if streaming_stopped():
+            return None
+        scene_count = planned_scenes[0] if planned_scenes else len(visuals_future.result())
+        # Same split of the narration as the final render
+        scene_duration = audio_duration(audio_path) / scene_count
+        writer = HlsWriter(workspace.path("hls"), scene_duration)
+        start = time.perf_counter()
+        for scene_number in range(1, scene_count + 1):
+            with images_ready:
+                images_ready.wait_for(lambda: scene_number in ready_images or visuals_future.done()
+                                      or stop_streaming.is_set())
+                image_path = ready_images.get(scene_number)
+            if image_path is None and not streaming_stopped():
+                # Failed scenes reuse a neighbouring image, exactly as in the final video
+                image_path = visuals_future.result()[scene_number - 1]
+            # Segments are encodes too, so they count against the render concurrency limit;
+            # the wait for a slot gives up as soon as the final render is due
+            while not streaming_stopped() and not render_slots.acquire(timeout=SLOT_POLL_SECONDS):
+                pass
+            if streaming_stopped():
+                break
+            try:
+                with tracing.span("segment", scene=scene_number):
+                    writer.add_segment(image_path, audio_path, scene_duration, size=IMAGE_SIZE)
+            finally:
+                render_slots.release()
+            if scene_number == 1:
+                logger.info("first segment playable %.2fs into the run", time.perf_counter() - timer.origin)
+                segments(writer.playlist_path, subtitles_path)
+        if len(writer) < scene_count:
+            logger.info("segment streaming stopped after %d of %d scenes", len(writer), scene_count)
+        else:
+            logger.info("%d segments streamed in %.2fs", scene_count, time.perf_counter() - start)
+        return writer.finish()
+
+    # The draft and the segments run on their own threads so the full render never waits for them
+    draft_executor = None
+    draft_future = None
+    stream_future = None
+    if (preview or segments) and overlapped and not checkpoint.completed("render"):
+        draft_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="preview")
+    try:
+        if overlapped:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                audio_future = executor.submit(tracing.propagate(stage), "tts", _narrate, story_text, workspace.root)
+                visuals_future = executor.submit(tracing.propagate(visuals))
+                if draft_executor and preview:
+                    draft_future = draft_executor.submit(tracing.propagate(draft), audio_future, visuals_future)
+                if draft_executor and segments:
+                    stream_future = draft_executor.submit(tracing.propagate(stream), audio_future, visuals_future)
+                try:
+                    image_paths = visuals_future.result()
+                finally:
+                    audio_path = audio_future.result()
+        else:
+            audio_path = stage("tts", _narrate, story_text, workspace.root)
+            image_paths = visuals()
+
+        # The final video supersedes the segments: stop the stream before it takes another render slot,
+        # so the final render only ever waits for the segment already encoding
+        stop_streaming.set()
+        wake_draft()
+        video_path = stage("render", _render, run_video_tool, image_paths, audio_path)
+
+        # Silent renders still need the narration muxed in (stream copy, no re-encode)
+        if not run_video_tool.embed_audio:
+            video_path = stage("mux", combine_audio_video, video_path, audio_path,
+                               workspace.path("video_with_audio.mp4"))
+        subtitles_path = stage("subtitles", _write_subtitles, story_text, audio_path,
+                               workspace.path("subtitles.vtt"))
+    finally:
+        stop_streaming.set()
+        wake_draft()
+        preview_path = None
+        playlist_path = None
+        if draft_future:
+            try:
+                preview_path = draft_future.result()
+            except Exception as e:
+                # A failed draft never fails the run
+                logger.warning("Preview render failed: %s", e)
+        if stream_future:
+            # Already stopped, so this waits for at most one segment; the workspace is
+            # cleaned up after the run and the stream must no longer be writing into it
+            try:
+                playlist_path = stream_future.result()
+            except Exception as e:
+                # Failed segments never fail the run: the final video is still delivered
+                logger.warning("Segment streaming failed: %s", e)
+        if draft_executor:
+            draft_executor.shutdown()
+
+    timings = timer.timings
+    # The render waits on whichever branch finished last
+    if timings["tts"]["end"] >= timings["images"]["end"]:
+        critical_path = ["research_and_writing", "tts", "render"]
+    else:
+        critical_path = ["research_and_writing", "scene_planning", "images", "render"]
+    critical_path += [name for name in ("mux", "subtitles") if name in timings]
+    total = time.perf_counter() - timer.origin
+
+    logger.info("total %.2fs, critical path: %s", total, " -> ".join(critical_path))
+    for name, timing in sorted(timings.items(), key=lambda item: item[1]["start"]):
+        logger.info("  %-22s %7.2fs -> %7.2fs (%.2fs)", name, timing["start"], timing["end"], timing["duration"])
+    # Process-wide totals: the pools are shared with every other job
+    for service, stats in registry.stats().items():
+        if stats["requests"]:
+            logger.info("  %-22s %d requests over %d connections (%.0f%% reused)", f"http:{service}",
+                        stats["requests"], stats["connections"], stats["reuse_ratio"] * 100)
+
+    return PipelineResult(
+        story_text=story_text,
+        preview_path=preview_path,
+        playlist_path=playlist_path,
+        audio_path=audio_path,
+        video_path=video_path,
+        subtitles_path=subtitles_path,
+        stage_timings=timings,
+        critical_path=critical_path,
+        total_seconds=total,
+    )
+
+
+def generate_story_video(topic: str, language: str, style: Optional[str] = None,
+                         force_regenerate: bool = False,
+                         progress: Optional[Callable[[str, float], None]] = None,
+                         publish: Optional[Callable[[str, Any], None]] = None,
+                         cancelled: Optional[Callable[[], bool]] = None,
+                         stream_segments: Optional[bool] = None) -> PipelineResult:
+    """
+    Serve a finished video from the result cache, or run the pipeline and store its output.
+
+    Args:
+        topic: Figure to tell the story of
+        language: Narration language
+        style: Optional visual style for the scene images
+        force_regenerate: Skip the cache lookup and always run the pipeline
+        progress: Optional stage progress callback, see run_pipeline
+        publish: Optional callback(name, value) for intermediate artifacts; receives
+            ("stream", {"playlist_path", "subtitles_path"}) once the first HLS segment is
+            playable, or ("preview", {"video_path", "subtitles_path"}) when the draft video
+            is ready if segments are not streamed
+        cancelled: Optional callable returning True once the run has been cancelled, see run_pipeline
+        stream_segments: Publish HLS segments rather than a draft video (defaults to STREAM_SEGMENTS)
+
+    Returns:
+        PipelineResult: The cached or freshly generated result
+    """
+    key = result_cache.make_key(topic, language, style or "", PIPELINE_VERSION)
+    with tracing.start_trace("generate_story_video", topic=topic, language=language, style=style), _run_lock(key):
+        if not force_regenerate:
+            with tracing.span("result_cache_lookup") as lookup_span:
+                cached = result_cache.get(key)
+                lookup_span.set(hit=bool(cached))
+            if cached:
+                logger.info("serving cached result for %r (%s, %s)", topic, language, style)
+                story_text = (result_cache.read_metadata(key) or {}).get("story_text", "")
+                result = PipelineResult(story_text=story_text, cached=True, **cached)
+                return _with_trace(result)
+
+        sweep_workspaces()
+        # The run ID is derived from the request, so a retry after a failure finds its checkpoints
+        workspace = Workspace(run_id=key)
+        if force_regenerate:
+            workspace.reset()
+        preview = segments = None
+        if stream_segments is None:
+            stream_segments = STREAM_SEGMENTS
+        if publish and stream_segments:
+            segments = lambda playlist_path, subtitles_path: publish(
+                "stream", {"playlist_path": playlist_path, "subtitles_path": subtitles_path})
+        elif publish:
+            preview = lambda video_path, subtitles_path: publish(
+                "preview", {"video_path": video_path, "subtitles_path": subtitles_path})
+        result = run_pipeline(topic, language, workspace, style=style, progress=progress,
+                              preview=preview, segments=segments, cancelled=cancelled)
+        with tracing.span("result_cache_store"):
+            stored = result_cache.put(key, result.video_path, result.subtitles_path, story_text=result.story_text)
+        if not stored:
+            # The entry alone exceeds the cache size cap; deliver from the workspace,
+            # which is left for sweep_workspaces() to remove once it goes stale
+            return _with_trace(result)
+        # Delivery now reads the cached copies, so the run's files can go
+        workspace.cleanup()
+        return _with_trace(result.model_copy(
+            update={**stored, "audio_path": None, "preview_path": None, "playlist_path": None}))
+
+
+def _run_lock(key: str) -> threading.Lock:
+    # Runs of the same request share a workspace, so they must not overlap
+    with _run_locks_guard:
+        return _run_locks.setdefault(key, threading.Lock())
+
+
+def _with_trace(result: PipelineResult) -> PipelineResult:
+    trace = tracing.current_trace()
+    return result.model_copy(update={"trace": trace.to_dict()}) if trace else result
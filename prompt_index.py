@@ -0,0 +1,206 @@
+import os
+import re
+import json
+import base64
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Words that appear in almost every image prompt and say nothing about the scene
+STOPWORDS = frozenset("""
+a an the and or of in on at to with for from by as is are was were be its it this that their his her
+into over under while very same scene image style detailed detail vivid
+""".split())
+
+# 2**32 + 15, the smallest prime above every 32-bit token hash
+_PRIME = np.uint64(4294967311)
+
+
+def prompt_features(prompt: str) -> List[str]:
+    """Normalized word unigrams and bigrams of a prompt, the unit of similarity."""
+    words = [w for w in _TOKEN_RE.findall(prompt.lower()) if w not in STOPWORDS]
+    return sorted(set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])})
+
+
+def _hash_features(features: List[str]) -> np.ndarray:
+    # blake2b instead of hash() so signatures are identical in every process
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=4).digest(), "little") for f in features),
+        dtype=np.uint64, count=len(features),
+    )
+
+
+class PromptIndex:
+    """
+    Near-duplicate search over the prompts of previously generated images.
+
+    Prompts are reduced to sets of word unigrams/bigrams and summarized by MinHash
+    signatures, whose agreement estimates the Jaccard similarity of two prompts.
+    Signatures are split into bands stored in hash tables (LSH), so a lookup
+    only touches the few entries that share a band with the query: the cost is
+    one signature computation plus a handful of dict probes, independent of how
+    many images the library holds.
+
+    Entries map a prompt to the image cache key of its image and are appended to
+    a JSONL file together with their signature, so a restart reloads the index
+    without recomputing them. Each entry is one line written by a single
+    O_APPEND write, so several processes can share the file without their
+    entries interleaving.
+    """
+
+    def __init__(self, path: Optional[str] = None, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        self._prompts: List[str] = []
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self._tables: List[Dict[bytes, List[int]]] = [defaultdict(list) for _ in range(bands)]
+        self._seen: Dict[str, int] = {}
+
+        if path:
+            self._load()
+
+    def signature(self, prompt: str) -> Optional[np.ndarray]:
+        """MinHash signature of a prompt, or None if it has no usable words."""
+        features = prompt_features(prompt)
+        if not features:
+            return None
+        hashes = _hash_features(features)
+        # (a * x + b) mod p for every permutation and feature, then the minimum per permutation
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _insert(self, prompt: str, cache_key: str, signature: np.ndarray) -> None:
+        entry_id = len(self._keys)
+        if entry_id == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+        self._signatures[entry_id] = signature
+        self._keys.append(cache_key)
+        self._prompts.append(prompt)
+        for table, band_key in zip(self._tables, self._band_keys(signature)):
+            table[band_key].append(entry_id)
+        self._seen[cache_key] = entry_id
+
+    def _encode(self, signature: np.ndarray) -> str:
+        return base64.b64encode(signature.astype("<u4").tobytes()).decode("ascii")
+
+    def _decode(self, encoded: str) -> Optional[np.ndarray]:
+        try:
+            signature = np.frombuffer(base64.b64decode(encoded), dtype="<u4").astype(np.uint32)
+        except (TypeError, ValueError):
+            return None
+        return signature if len(signature) == self.num_perm else None
+
+    def _append(self, text: str) -> None:
+        # One write on an O_APPEND descriptor, so concurrent writers never interleave within a line
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, text.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def _load(self) -> None:
+        recomputed = skipped = 0
+        line = "\n"
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        entry = json.loads(line)
+                        prompt, cache_key = entry["prompt"], entry["key"]
+                    except (ValueError, TypeError, KeyError):
+                        # Torn line from a crash, or not an entry at all
+                        logger.warning("%s:%d: unreadable prompt index entry, skipped", self.path, line_number)
+                        skipped += 1
+                        continue
+                    if cache_key in self._seen:
+                        continue
+                    signature = self._decode(entry["sig"]) if isinstance(entry.get("sig"), str) else None
+                    if signature is None:
+                        # Older entry, or one written with different MinHash settings
+                        signature = self.signature(prompt)
+                        recomputed += 1
+                    if signature is None:
+                        logger.warning("%s:%d: prompt has no usable words, skipped", self.path, line_number)
+                        skipped += 1
+                        continue
+                    self._insert(prompt, cache_key, signature)
+        except FileNotFoundError:
+            return
+        if not line.endswith("\n"):
+            # Terminate a torn final line so the next append starts on a line of its own
+            self._append("\n")
+        if recomputed:
+            logger.info("Recomputed %d prompt signatures", recomputed)
+        logger.info("Prompt index loaded with %d images (%d entries skipped)", len(self._keys), skipped)
+
+    def add(self, prompt: str, cache_key: str) -> bool:
+        """
+        Record that the image stored under cache_key was generated from prompt.
+
+        Returns:
+            bool: Whether the entry was added (False for duplicates and empty prompts)
+        """
+        signature = self.signature(prompt)
+        if signature is None:
+            return False
+        with self._lock:
+            if cache_key in self._seen:
+                return False
+            self._insert(prompt, cache_key, signature)
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                record = {"key": cache_key, "prompt": prompt, "sig": self._encode(signature)}
+                self._append(json.dumps(record, ensure_ascii=False) + "\n")
+        return True
+
+    def search(self, prompt: str, threshold: float, limit: int = 5) -> List[Tuple[str, float, str]]:
+        """
+        Stored images whose prompts are at least `threshold` similar to prompt.
+
+        Args:
+            prompt: Prompt to look up
+            threshold: Minimum estimated Jaccard similarity (0-1) of the prompts' word sets
+            limit: Maximum number of matches
+
+        Returns:
+            list: (cache_key, similarity, stored prompt) tuples, most similar first
+        """
+        signature = self.signature(prompt)
+        if signature is None:
+            return []
+        with self._lock:
+            candidates = set()
+            for table, band_key in zip(self._tables, self._band_keys(signature)):
+                candidates.update(table.get(band_key, ()))
+            if not candidates:
+                return []
+            ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            similarity = (self._signatures[ids] == signature).mean(axis=1)
+            keep = similarity >= threshold
+            ids, similarity = ids[keep], similarity[keep]
+            order = np.argsort(-similarity, kind="stable")[:limit]
+            return [(self._keys[ids[i]], float(similarity[i]), self._prompts[ids[i]]) for i in order]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._keys)
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+from typing import Optional, Dict
+from disk_cache import DiskCache
+
+
+class ResultCache:
+    """
+    Persistent store of finished videos keyed by (topic, language, style, pipeline version).
+
+    Each entry is a directory holding the MP4, the VTT and a meta.json with the
+    creation time. Entries are staged in a temporary directory and renamed into
+    place, expire after ttl_seconds, and the least recently served ones are
+    evicted when the store grows past max_bytes.
+    """
+
+    VIDEO_NAME = "video.mp4"
+    SUBTITLES_NAME = "subtitles.vtt"
+    META_NAME = "meta.json"
+    TMP_PREFIX = ".tmp-"
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def make_key(topic: str, language: str, style: str, version: str) -> str:
+        """Hash the normalized request parameters into an entry key."""
+        normalize = lambda value: " ".join(str(value).lower().split())
+        return DiskCache.make_key(normalize(topic), normalize(language), normalize(style), version)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def _read_meta(self, entry_dir: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(entry_dir, self.META_NAME), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _expired(self, meta: dict) -> bool:
+        return time.time() - meta.get("created_at", 0) > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """
+        Look up a finished result.
+
+        Returns:
+            Optional[dict]: {"video_path", "subtitles_path"} or None on a miss or expired entry
+        """
+        entry_dir = self._entry_dir(key)
+        meta = self._read_meta(entry_dir)
+        if meta is None:
+            return None
+        if self._expired(meta):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        # The directory mtime doubles as the last-served time for LRU eviction
+        try:
+            os.utime(entry_dir, None)
+        except FileNotFoundError:
+            return None
+        return {
+            "video_path": os.path.abspath(os.path.join(entry_dir, self.VIDEO_NAME)),
+            "subtitles_path": os.path.abspath(os.path.join(entry_dir, self.SUBTITLES_NAME)),
+        }
+
+    def put(self, key: str, video_path: str, subtitles_path: str, **metadata) -> Dict[str, str]:
+        """
+        Copy a finished video and its subtitles into the store.
+
+        Returns:
+            dict: Paths of the stored copies
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(dir=self.directory, prefix=self.TMP_PREFIX)
+        try:
+            shutil.copyfile(video_path, os.path.join(staging_dir, self.VIDEO_NAME))
+            shutil.copyfile(subtitles_path, os.path.join(staging_dir, self.SUBTITLES_NAME))
+            with open(os.path.join(staging_dir, self.META_NAME), "w", encoding="utf-8") as f:
+                json.dump({"created_at": time.time(), **metadata}, f)
+
+            entry_dir = self._entry_dir(key)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            try:
+                os.replace(staging_dir, entry_dir)
+            except OSError:
+                if not os.path.isdir(entry_dir):
+                    raise
+                # Another process stored the same result in between; keep theirs
+                shutil.rmtree(staging_dir, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+
+        self.evict()
+        return self.get(key)
+
+    def read_metadata(self, key: str) -> Optional[dict]:
+        """Metadata stored alongside an entry, or None if it does not exist."""
+        return self._read_meta(self._entry_dir(key))
+
+    def invalidate(self, key: str) -> None:
+        """Remove a single entry."""
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def evict(self) -> int:
+        """
+        Drop expired entries, then least recently served ones until under max_bytes.
+
+        Returns:
+            int: Number of entries removed
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+
+        entries = []
+        removed = 0
+        for name in names:
+            if name.startswith(self.TMP_PREFIX):
+                continue
+            entry_dir = self._entry_dir(name)
+            meta = self._read_meta(entry_dir)
+            if meta is None or self._expired(meta):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                removed += 1
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_dir))
+                entries.append((os.stat(entry_dir).st_mtime, size, entry_dir))
+            except FileNotFoundError:
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+result_cache = ResultCache(
+    os.getenv("RESULT_CACHE_DIR", os.path.join("cache", "results")),
+    max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", 5 * 1024 ** 3)),
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL", 7 * 24 * 3600)),
+)
@@ -0,0 +1,113 @@
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# LLM attributes forwarded to the streaming completion call when set
+_LLM_PARAMS = ("api_key", "base_url", "api_base", "api_version", "temperature", "max_tokens")
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser for a JSON array of objects arriving in arbitrary pieces.
+
+    feed() returns every object whose closing brace has arrived, so the caller can
+    act on the first elements long before the array is complete. Text before the
+    opening bracket (markdown fences, preamble) and after the closing one is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._object_start = -1
+        self.started = False
+        self.finished = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume more text and return the objects completed by it, in order."""
+        if self.finished:
+            return []
+        self._buffer += text
+        objects = []
+        buffer = self._buffer
+        pos = self._pos
+
+        while pos < len(buffer):
+            char = buffer[pos]
+            if not self.started:
+                if char == "[":
+                    self.started = True
+                    self._depth = 1
+                pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if char == "{" and self._depth == 1:
+                    self._object_start = pos
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == 1 and char == "}" and self._object_start >= 0:
+                    objects.append(json.loads(buffer[self._object_start:pos + 1]))
+                    self._object_start = -1
+                elif self._depth == 0:
+                    self.finished = True
+                    break
+            pos += 1
+
+        # Drop consumed text that no pending object refers to
+        keep_from = self._object_start if self._object_start >= 0 else pos
+        self._buffer = buffer[keep_from:]
+        self._pos = pos - keep_from
+        if self._object_start >= 0:
+            self._object_start = 0
+        return objects
+
+
+def iter_json_array(pieces: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Yield the objects of a streamed JSON array as soon as each one is complete."""
+    parser = JsonArrayStreamParser()
+    for piece in pieces:
+        yield from parser.feed(piece)
+        if parser.finished:
+            break
+    if not parser.started:
+        raise ValueError("No JSON array found in response")
+
+
+def stream_llm_text(llm: Any, prompt: str) -> Iterator[str]:
+    """
+    Yield the LLM's response to a single user prompt as it is generated.
+
+    LiteLLM-backed LLMs (anything with a string .model, like CrewAI's LLM) are
+    streamed through litellm.completion(stream=True). Other objects, or a stream
+    that cannot be opened, fall back to one blocking .call() yielded as a single piece.
+    """
+    model = getattr(llm, "model", None)
+    if isinstance(model, str):
+        try:
+            from litellm import completion
+            params = {name: getattr(llm, name) for name in _LLM_PARAMS if getattr(llm, name, None) is not None}
+            response = completion(model=model, messages=[{"role": "user", "content": prompt}], stream=True, **params)
+        except Exception as e:
+            logger.warning("Could not stream the LLM response (%s), waiting for the full reply instead", e)
+        else:
+            for chunk in response:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+            return
+    yield llm.call(prompt)
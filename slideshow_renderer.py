@@ -0,0 +1,104 @@
+import os
+import subprocess
+import tempfile
+from typing import List, Optional, Tuple
+from moviepy.config import FFMPEG_BINARY
+
+
+def _concat_entry(path: str) -> str:
+    # ffconcat quoting: close the quote, emit an escaped quote, reopen
+    escaped = os.path.abspath(path).replace("'", "'\\''")
+    return f"file '{escaped}'"
+
+
+def write_concat_list(image_paths: List[str], durations: List[float], list_path: str) -> str:
+    """
+    Write an ffconcat playlist that shows each image for its own duration.
+
+    Args:
+        image_paths: Images in display order
+        durations: Display duration in seconds for each image
+        list_path: Where to write the playlist
+
+    Returns:
+        str: Path of the playlist
+    """
+    if len(image_paths) != len(durations):
+        raise ValueError("image_paths and durations must have the same length")
+
+    lines = ["ffconcat version 1.0"]
+    for path, duration in zip(image_paths, durations):
+        lines.append(_concat_entry(path))
+        lines.append(f"duration {duration:.6f}")
+    # The concat demuxer ignores the duration of the last entry unless it is repeated
+    lines.append(_concat_entry(image_paths[-1]))
+
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return list_path
+
+
+def render_slideshow(
+    image_paths: List[str],
+    durations: List[float],
+    output_path: str,
+    audio_path: Optional[str] = None,
+    size: Optional[Tuple[int, int]] = None,
+    preset: str = "medium",
+    crf: int = 23,
+) -> str:
+    """
+    Encode a slideshow where every still is encoded exactly once.
+
+    The stills go through the ffmpeg concat demuxer and are written as a
+    variable-frame-rate H.264 stream, so each scene becomes a single keyframe
+    whose sample duration is the scene's display time, instead of hundreds of
+    duplicated frames at a fixed rate.
+
+    Args:
+        image_paths: Images in display order
+        durations: Display duration in seconds for each image
+        output_path: Path of the MP4 to write
+        audio_path: Optional narration to mux in during the same encode
+        size: Optional (width, height) to scale the stills to
+        preset: libx264 preset
+        crf: libx264 constant rate factor
+
+    Returns:
+        str: Absolute path of the rendered video
+    """
+    if not image_paths:
+        raise ValueError("No images to render")
+
+    video_filter = "format=yuv420p"
+    if size:
+        video_filter = f"scale={size[0]}:{size[1]},{video_filter}"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        list_path = write_concat_list(image_paths, durations, os.path.join(tmp_dir, "scenes.ffconcat"))
+
+        command = [FFMPEG_BINARY, "-y", "-loglevel", "error",
+                   "-f", "concat", "-safe", "0", "-i", list_path]
+        if audio_path:
+            command += ["-i", str(audio_path)]
+        command += ["-map", "0:v:0"]
+        if audio_path:
+            command += ["-map", "1:a:0", "-c:a", "aac"]
+        command += [
+            "-vf", video_filter,
+            "-fps_mode", "vfr",
+            "-c:v", "libx264",
+            "-tune", "stillimage",
+            "-preset", preset,
+            "-crf", str(crf),
+            # Every frame is a scene change, so make each one seekable
+            "-g", "1",
+            "-movflags", "+faststart",
+            str(output_path),
+        ]
+
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg slideshow render failed: {result.stderr.strip()}")
+
+    return os.path.abspath(output_path)
@@ -1,14 +1,41 @@
-from deepgram import DeepgramClient, SpeakOptions  
 from crewai.tools import BaseTool  
 from pydantic import BaseModel, Field  
 from typing import Type, List  
 import time  
 import os  
+import uuid  
 import re  
+import random
+import logging
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from disk_cache import DiskCache
+from wav_assembler import WavAssembler
+from audio_manifest import write_audio_manifest
+from clients import registry
+import tracing
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+TTS_MODEL = "aura-2-thalia-en"
+TTS_ENCODING = "linear16"
+TTS_CONTAINER = "wav"
+
+# Synthesized chunks are cached per voice model so repeated sentences are never re-spoken
+audio_cache = DiskCache(
+    os.getenv("TTS_CACHE_DIR", os.path.join("cache", "tts")),
+    max_bytes=int(os.getenv("TTS_CACHE_MAX_BYTES", 1024 ** 3)),
+    suffix=".wav",
+)
+
+
+def invalidate_voice_model(model: str) -> int:
+    """Drop every cached chunk synthesized with the given voice model, returns the number removed"""
+    return audio_cache.invalidate(model)
+
 class MyToolInput(BaseModel):  
     """Input schema for the speech generator"""  
     text: str = Field(..., description="The text to convert to speech (will be chunked if too long)")  
@@ -17,52 +44,98 @@ class MyCustomTool(BaseTool):
     name: str = "text_to_speech_generator"  
     description: str = "Converts text to speech and combines into single audio file, then returns the path of the audio file"  
     args_schema: Type[BaseModel] = MyToolInput  
+
+    # Chunk synthesis settings
+    max_workers: int = Field(default=4, description="Maximum number of chunks synthesized concurrently")
+    max_retries: int = Field(default=3, description="Retries for a single failed chunk before giving up")
+    retry_backoff: float = Field(default=1.0, description="Base delay in seconds between chunk retries")
+    output_dir: str = Field(default="audio_files", description="Directory the combined narration is written to")
   
     def _run(self, text: str) -> str:  
-        print(f"[DEBUG] Starting text-to-speech conversion for text of length: {len(text)}")  
+        logger.debug("Starting text-to-speech conversion for text of length: %d", len(text))  
           
         # Create directory for audio files  
-        os.makedirs("audio_files", exist_ok=True)  
-        print("[DEBUG] Created/verified audio_files directory")  
+        os.makedirs(self.output_dir, exist_ok=True)  
           
         # Clean text before processing  
         cleaned_text = self._clean_text_for_tts(text)  
-        print(f"[DEBUG] Text cleaned, new length: {len(cleaned_text)}")  
           
         # Split text into sentence-based chunks with smaller max length  
         chunks = self._split_text_by_sentences(cleaned_text, max_length=1000)  
-        print(f"[DEBUG] Text split into {len(chunks)} chunks")  
-          
-        # Initialize Deepgram client  
-        deepgram = DeepgramClient(api_key="NA")  
-          
-        # Generate audio for each chunk  
-        audio_files = []  
-        for i, chunk in enumerate(chunks):  
-            print(f"[DEBUG] Processing chunk {i+1}/{len(chunks)} (length: {len(chunk)})")  
-            filename = self._generate_audio_chunk(deepgram, chunk, i)  
-            if filename:  
-                audio_files.append(filename)  
-                print(f"[DEBUG] Successfully generated audio: {filename}")  
-            else:  
-                print(f"[DEBUG] Failed to generate audio for chunk {i}")  
-          
-        print(f"[DEBUG] Generated {len(audio_files)} audio files out of {len(chunks)} chunks")  
+        logger.debug("Text split into %d chunks", len(chunks))  
+          
+        # Serve already spoken chunks from the cache  
+        cached_paths = [audio_cache.get(self._chunk_cache_key(chunk), group=TTS_MODEL) for chunk in chunks]  
+        missing = [i for i, path in enumerate(cached_paths) if not path]  
+        logger.info("Audio cache: %d hits, %d misses", len(chunks) - len(missing), len(missing))  
+          
+        # Unique per call so concurrent runs sharing a directory never collide  
+        combined_filename = os.path.join(self.output_dir, f"complete_story_{uuid.uuid4().hex}.wav")  
+        deepgram = None  
+        executor = None  
+        futures = {}  
+        try:  
+            if missing:  
+                # Shared pooled client, so chunks and concurrent jobs reuse warm connections  
+                deepgram = registry.deepgram()  
+                executor = ThreadPoolExecutor(max_workers=max(1, self.max_workers))  
+                futures = {  
+                    i: executor.submit(tracing.propagate(self._generate_audio_chunk_with_retry), deepgram, chunks[i], i)  
+                    for i in missing  
+                }  
+              
+            # Stream every chunk's PCM into the output in order as soon as it is available  
+            with tracing.span("tts_assemble", chunks=len(chunks), cached_chunks=len(chunks) - len(missing)) as assemble_span, \
+                    WavAssembler(combined_filename) as assembler:  
+                for i, chunk in enumerate(chunks):  
+                    if i in futures:  
+                        audio_data = futures.pop(i).result()  
+                    else:  
+                        audio_data = self._read_cached_chunk(cached_paths[i])  
+                        if audio_data is None:  
+                            # Evicted by another process since the lookup  
+                            deepgram = deepgram or registry.deepgram()  
+                            audio_data = self._generate_audio_chunk_with_retry(deepgram, chunk, i)  
+                    if audio_data is None:  
+                        # A missing chunk would leave a silent gap in the narration, so fail the whole run  
+                        raise RuntimeError(f"Failed to generate audio for chunk {i} after retries")  
+                    assembler.append(audio_data)  
+                    del audio_data  
+                assemble_span.set(bytes=assembler.data_bytes, audio_seconds=assembler.duration)  
+                  
+            logger.info("Narration assembled: %s (%d PCM bytes, %.2fs)",  
+                        combined_filename, assembler.data_bytes, assembler.duration)  
+              
+            # Record the exact chunk boundaries so downstream steps never have to decode the audio  
+            manifest_chunks = []  
+            start = 0.0  
+            for chunk, duration in zip(chunks, assembler.chunk_durations()):  
+                manifest_chunks.append({"text": chunk, "start": start, "duration": duration})  
+                start += duration  
+            write_audio_manifest(combined_filename, assembler.sample_rate, assembler.channels,  
+                                 assembler.sample_width, manifest_chunks)  
+            return os.path.abspath(combined_filename)  
           
-        # Combine all audio files  
-        if audio_files:  
-            print("[DEBUG] Starting audio combination process")  
-            combined_file = self._combine_audio_files(audio_files)  
-            print(f"[DEBUG] Audio combination completed: {combined_file}")  
-            return os.path.abspath(combined_file)  
-        else:  
-            print("[DEBUG] No audio files were generated - returning error")  
-            return "Failed to generate audio files"  
+        except Exception as e:  
+            logger.error("Narration failed, partial audio discarded: %s", e)  
+            return f"Failed to generate audio files: {str(e)}"  
+          
+        finally:  
+            if executor:  
+                for future in futures.values():  
+                    future.cancel()  
+                executor.shutdown(wait=True)  
+  
+    def _read_cached_chunk(self, path: str) -> bytes:  
+        """Read a cached chunk, returning None if it disappeared"""  
+        try:  
+            with open(path, 'rb') as f:  
+                return f.read()  
+        except FileNotFoundError:  
+            return None  
   
     def _clean_text_for_tts(self, text: str) -> str:  
         """Remove markdown and other formatting that might cause TTS issues"""  
-        print("[DEBUG] Cleaning text for TTS")  
-          
         # Remove markdown bold/italic  
         text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)  # **bold** -> bold  
         text = re.sub(r'\*([^*]+)\*', r'\1', text)      # *italic* -> italic  
@@ -70,155 +143,73 @@ class MyCustomTool(BaseTool):
         # Remove extra whitespace and newlines  
         text = re.sub(r'\s+', ' ', text).strip()  
           
-        print("[DEBUG] Text cleaning completed")  
         return text  
   
     def _split_text_by_sentences(self, text: str, max_length: int = 1000) -> List[str]:  
         """Split text into chunks at sentence boundaries"""  
-        print(f"[DEBUG] Starting text splitting with max_length: {max_length}")  
-          
         # Split text into sentences using regex  
         sentences = re.split(r'(?<=[.!?])\s+', text.strip())  
-        print(f"[DEBUG] Found {len(sentences)} sentences in the text")  
           
         chunks = []  
         current_chunk = ""  
           
-        for i, sentence in enumerate(sentences):  
-            print(f"[DEBUG] Processing sentence {i+1}: '{sentence[:50]}...' (length: {len(sentence)})")  
-              
+        for sentence in sentences:  
             # Check if adding this sentence would exceed max_length  
             if len(current_chunk) + len(sentence) + 1 <= max_length:  
                 current_chunk += sentence + " "  
-                print(f"[DEBUG] Added sentence to current chunk (chunk length now: {len(current_chunk)})")  
             else:  
                 # Save current chunk and start new one  
                 if current_chunk.strip():  
                     chunks.append(current_chunk.strip())  
-                    print(f"[DEBUG] Saved chunk {len(chunks)} with length: {len(current_chunk.strip())}")  
                 current_chunk = sentence + " "  
-                print(f"[DEBUG] Started new chunk with this sentence")  
           
         # Add the last chunk if it has content  
         if current_chunk.strip():  
             chunks.append(current_chunk.strip())  
-            print(f"[DEBUG] Added final chunk {len(chunks)} with length: {len(current_chunk.strip())}")  
           
-        print(f"[DEBUG] Text splitting completed. Created {len(chunks)} total chunks")  
+        logger.debug("Split %d sentences into %d chunks (max_length %d)", len(sentences), len(chunks), max_length)  
         return chunks  
   
-    def _generate_audio_chunk(self, deepgram_client, text: str, chunk_number: int) -> str:  
-        """Generate audio for a single text chunk using Deepgram SDK"""  
-        print(f"[DEBUG] Making API request for chunk {chunk_number}")  
-        print(f"[DEBUG] Text preview: '{text[:100]}...'")  
-          
-        try:  
-            # Configure TTS options  
-            options = SpeakOptions(  
-                model="aura-2-thalia-en",  
-                encoding="linear16",  
-                container="wav"  
-            )  
-              
-            # Generate speech using Deepgram SDK  
-            response = deepgram_client.speak.rest.v("1").stream_memory(  
-                {"text": text},   
-                options  
-            )  
-              
-            print(f"[DEBUG] API request successful")  
-              
-            filename = f"audio_files/chunk_{chunk_number}_{int(time.time())}.wav"  
-            print(f"[DEBUG] Saving audio to: {filename}")  
-              
-            with open(filename, 'wb') as f:  
-                f.write(response.stream_memory.getbuffer())  
-              
-            file_size = os.path.getsize(filename)  
-            print(f"[DEBUG] Audio file saved successfully. Size: {file_size} bytes")  
-            return filename  
-              
-        except Exception as e:  
-            print(f"[DEBUG] Exception during API request: {str(e)}")  
+    def _chunk_cache_key(self, text: str) -> str:  
+        """Cache key for a chunk: normalized text plus every option that changes the audio"""  
+        normalized = unicodedata.normalize("NFC", " ".join(text.split()))  
+        return DiskCache.make_key(normalized, TTS_MODEL, TTS_ENCODING, TTS_CONTAINER)  
+  
+    def _generate_audio_chunk_with_retry(self, deepgram_client, text: str, chunk_number: int) -> bytes:  
+        """Generate audio for a single chunk, retrying only that chunk with jittered backoff"""  
+        with tracing.span("tts_chunk", chunk=chunk_number, chars=len(text)) as chunk_span:  
+            for attempt in range(self.max_retries + 1):  
+                audio_data = self._generate_audio_chunk(deepgram_client, text, chunk_number)  
+                if audio_data:  
+                    chunk_span.set(bytes=len(audio_data), retries=attempt)  
+                    return audio_data  
+                if attempt < self.max_retries:  
+                    delay = self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5)  
+                    logger.warning("Retrying chunk %d in %.2fs (attempt %d/%d)",  
+                                   chunk_number, delay, attempt + 2, self.max_retries + 1)  
+                    time.sleep(delay)  
+            chunk_span.set(retries=self.max_retries, failed=True)  
             return None  
   
-    def _combine_audio_files(self, audio_files: List[str]) -> str:  
-        """Combine multiple audio files"""  
-        combined_filename = f"audio_files/complete_story_{int(time.time())}.wav"  
-        print(f"[DEBUG] Starting audio combination. Output file: {combined_filename}")  
-        print(f"[DEBUG] Files to combine: {audio_files}")  
+    def _generate_audio_chunk(self, deepgram_client, text: str, chunk_number: int) -> bytes:  
+        """Generate audio for a single text chunk with Deepgram, returning the WAV bytes"""  
+        logger.debug("Making API request for chunk %d (%d chars)", chunk_number, len(text))  
           
         try:  
-            # Try using pydub for better quality  
-            from pydub import AudioSegment  
-            print("[DEBUG] Using pydub for audio combination")  
-            combined = AudioSegment.empty()  
-              
-            for i, audio_file in enumerate(audio_files):  
-                # Use full path to ensure file is found  
-                full_path = os.path.abspath(audio_file)  
-                print(f"[DEBUG] Processing file {i+1}/{len(audio_files)}: {full_path}")  
-                  
-                if os.path.exists(full_path):  
-                    print(f"[DEBUG] File exists, loading audio segment")  
-                    audio = AudioSegment.from_wav(full_path)  
-                    combined += audio  
-                    print(f"[DEBUG] Added audio segment (duration: {len(audio)}ms)")  
-                else:  
-                    print(f"[DEBUG] WARNING: File does not exist: {full_path}")  
-              
-            print(f"[DEBUG] Exporting combined audio (total duration: {len(combined)}ms)")  
-            combined.export(combined_filename, format="wav")  
-            print("[DEBUG] Export completed successfully")  
-              
-            # Clean up individual chunk files  
-            print("[DEBUG] Starting cleanup of individual chunk files")  
-            for audio_file in audio_files:  
-                try:  
-                    os.remove(audio_file)  
-                    print(f"[DEBUG] Deleted chunk file: {audio_file}")  
-                except OSError as e:  
-                    print(f"[DEBUG] Could not delete {audio_file}: {str(e)}")  
-                      
-        except ImportError:  
-            print("[DEBUG] pydub not available, using simple binary combination")  
-            # Fallback to simple binary combination  
-            self._simple_combine(audio_files, combined_filename)  
-          
-        print(f"[DEBUG] Audio combination completed: {combined_filename}")  
-        return combined_filename  
-  
-    def _simple_combine(self, audio_files: List[str], output_filename: str):  
-        """Simple binary combination fallback method"""  
-        print(f"[DEBUG] Starting simple binary combination to: {output_filename}")  
-          
-        with open(output_filename, 'wb') as outfile:  
-            for i, audio_file in enumerate(audio_files):  
-                full_path = os.path.abspath(audio_file)  
-                print(f"[DEBUG] Processing file {i+1}/{len(audio_files)}: {full_path}")  
-                  
-                if os.path.exists(full_path):  
-                    with open(full_path, 'rb') as infile:  
-                        # Skip WAV header for all files except the first one  
-                        if audio_file != audio_files[0]:  
-                            infile.seek(44)  # Skip 44-byte WAV header  
-                            print(f"[DEBUG] Skipped WAV header for file {i+1}")  
-                        else:  
-                            print(f"[DEBUG] Keeping WAV header for first file")  
-                          
-                        data = infile.read()  
-                        outfile.write(data)  
-                        print(f"[DEBUG] Written {len(data)} bytes from {audio_file}")  
-                else:  
-                    print(f"[DEBUG] WARNING: File does not exist: {full_path}")  
-          
-        print("[DEBUG] Starting cleanup of individual files")  
-        # Clean up individual files  
-        for audio_file in audio_files:  
+            # Generate speech over the shared keep-alive pool  
+            audio_data = deepgram_client.speak(  
+                text,  
+                model=TTS_MODEL,  
+                encoding=TTS_ENCODING,  
+                container=TTS_CONTAINER  
+            )  
             try:  
-                os.remove(audio_file)  
-                print(f"[DEBUG] Deleted chunk file: {audio_file}")  
+                path = audio_cache.put(self._chunk_cache_key(text), audio_data, group=TTS_MODEL)  
+                logger.debug("Audio for chunk %d cached at: %s (%d bytes)", chunk_number, path, len(audio_data))  
             except OSError as e:  
-                print(f"[DEBUG] Could not delete {audio_file}: {str(e)}")  
-          
-        print("[DEBUG] Simple binary combination completed")
+                logger.warning("Could not cache chunk %d: %s", chunk_number, e)  
+            return audio_data  
+              
+        except Exception as e:  
+            logger.warning("Exception during API request for chunk %d: %s", chunk_number, e)  
+            return None
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+from typing import Any, Callable, Dict, List, Optional
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+# Tracing can be switched off entirely; span() then costs a context-var lookup
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") != "0"
+TRACE_DIR = os.getenv("TRACE_DIR")
+
+
+class Span:
+    """One timed operation inside a trace, with free-form attributes (bytes, retries, ...)."""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start", "end", "attributes", "checkpoint", "_token")
+
+    def __init__(self, trace: "Trace", name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.start = 0.0
+        self.end: Optional[float] = None
+        self.attributes = attributes
+        self.checkpoint = 0.0
+        self._token = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.start = self.checkpoint = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attributes["error"] = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.trace._add(self)
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        end = self.end if self.end is not None else time.perf_counter()
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start - origin,
+            "duration": end - self.start,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned when there is no active trace."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Collection of spans for one pipeline run."""
+
+    def __init__(self, name: str, **attributes: Any):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes
+        self.origin = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._token = None
+
+    def _add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def __enter__(self) -> "Trace":
+        self._token = _current_trace.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_trace.reset(self._token)
+        if TRACE_DIR:
+            self.export(os.path.join(TRACE_DIR, f"{self.trace_id}.json"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "attributes": self.attributes,
+            "spans": [s.to_dict(self.origin) for s in spans],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, default=str)
+
+    def export(self, path: str) -> str:
+        """Write the trace as JSON and return the path."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+        return path
+
+
+def start_trace(name: str, **attributes: Any):
+    """Start a trace that spans opened in this context (and propagated threads) attach to."""
+    if not TRACING_ENABLED:
+        return NOOP_SPAN
+    return Trace(name, **attributes)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def span(name: str, **attributes: Any):
+    """
+    Time a block as a child of the current span.
+
+    Usage:
+        with tracing.span("tts_chunk", chunk=3) as s:
+            ...
+            s.set(bytes=len(data))
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return NOOP_SPAN
+    return Span(trace, name, _current_span.get(), attributes)
+
+
+def annotate(**attributes: Any) -> None:
+    """Add attributes to the current span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def checkpoint(name: str, **attributes: Any) -> None:
+    """
+    Record a child span covering the time since the current span started or since the
+    previous checkpoint. Used where only completion callbacks are available (crew tasks).
+    """
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    if trace is None or parent is None:
+        return
+    now = time.perf_counter()
+    child = Span(trace, name, parent, attributes)
+    child.start, child.end = parent.checkpoint, now
+    parent.checkpoint = now
+    trace._add(child)
+
+
+def propagate(fn: Callable) -> Callable:
+    """Bind fn to the caller's context so spans from executor threads join the current trace."""
+    context = contextvars.copy_context()
+    # A Context can only be entered by one thread at a time, so each call runs in its own copy
+    return lambda *args, **kwargs: context.copy().run(fn, *args, **kwargs)
@@ -2,6 +2,10 @@ import os
 from datetime import timedelta
 from moviepy import AudioFileClip
 import re
+import logging
+import tracing
+
+logger = logging.getLogger(__name__)
 
 # Converts seconds to VTT timestamp: HH:MM:SS.mmm
 def seconds_to_timestamp(seconds):
@@ -31,6 +35,26 @@ def generate_vtt(subtitle_text, total_duration):
 
     return '\n'.join(vtt_lines)
 
+# Generates .vtt content from the TTS chunk timings recorded in the audio manifest.
+# Cues stay inside the real span of the chunk they were spoken in, so drift from
+# uneven speaking speed can never accumulate across the whole narration.
+def generate_vtt_from_chunks(chunks):
+    vtt_lines = ["WEBVTT\n"]
+
+    for chunk in chunks:
+        sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', clean_subtitle_text(chunk["text"])) if s.strip()]
+        if not sentences:
+            continue
+        # Share the chunk's duration between its sentences by character count
+        total_chars = sum(len(s) for s in sentences)
+        start = chunk["start"]
+        for sentence in sentences:
+            end = start + chunk["duration"] * len(sentence) / total_chars
+            vtt_lines.append(f"{seconds_to_timestamp(start)} --> {seconds_to_timestamp(end)}\n{sentence}\n")
+            start = end
+
+    return '\n'.join(vtt_lines)
+
 
 
 def clean_subtitle_text(text:str):
@@ -47,9 +71,37 @@ def clean_subtitle_text(text:str):
     return text.strip()
 
 from moviepy import VideoFileClip, AudioFileClip
+from moviepy.config import FFMPEG_BINARY
+import subprocess
+
+
+def combine_audio_video(video_path, audio_path, output_path=None, reencode=False):
+    # Without an explicit output the muxed file goes next to the input video, so
+    # concurrent runs working in separate directories never share an output name
+    if output_path is None:
+        output_path = os.path.splitext(str(video_path))[0] + "_with_audio.mp4"
+
+    # By default the already-encoded video track is stream-copied and only the
+    # narration is encoded, so the pictures are never decoded or encoded again
+    if not reencode:
+        command = [
+            FFMPEG_BINARY, "-y", "-loglevel", "error",
+            "-i", str(video_path),
+            "-i", str(audio_path),
+            "-map", "0:v:0", "-map", "1:a:0",
+            "-c:v", "copy",
+            "-c:a", "aac",
+            "-shortest",
+            "-movflags", "+faststart",
+            str(output_path),
+        ]
+        with tracing.span("ffmpeg_mux", mode="stream_copy") as mux_span:
+            result = subprocess.run(command, capture_output=True, text=True)
+            mux_span.set(returncode=result.returncode)
+        if result.returncode == 0:
+            return os.path.abspath(output_path)
+        logger.warning("Stream-copy mux failed, re-encoding instead: %s", result.stderr.strip())
 
-
-def combine_audio_video(video_path, audio_path, output_path="output.mp4"):
     video = VideoFileClip(video_path)  
     audio = AudioFileClip(audio_path)  
       
@@ -57,12 +109,8 @@ def combine_audio_video(video_path, audio_path, output_path="output.mp4"):
     final_video = video.with_audio(audio)  
       
     # Write the video file  
-    final_video.write_videofile(output_path)  
+    with tracing.span("ffmpeg_mux", mode="reencode"):  
+        final_video.write_videofile(output_path)  
       
     # Return the absolute path of the created file  
-    return os.path.abspath(output_path)
-
-
-
-
-
+    return os.path.abspath(output_path)
\ No newline at end of file
@@ -0,0 +1,158 @@
+import os
+import struct
+from typing import List, Optional, Tuple
+
+
+def parse_wav(wav_data: bytes) -> Tuple[bytes, memoryview]:
+    """
+    Split an in-memory WAV file into its fmt chunk body and PCM payload.
+
+    Streaming encoders (Deepgram included) may leave the RIFF/data size fields
+    at 0 or 0xFFFFFFFF, so a data chunk whose declared size does not fit in the
+    buffer is taken to run until the end of the buffer.
+
+    Args:
+        wav_data: Complete WAV file contents
+
+    Returns:
+        tuple: (fmt chunk body, zero-copy view of the PCM payload)
+    """
+    view = memoryview(wav_data)
+    if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE buffer")
+
+    fmt_body = None
+    offset = 12
+    while offset + 8 <= len(view):
+        chunk_id = bytes(view[offset:offset + 4])
+        chunk_size = struct.unpack_from("<I", view, offset + 4)[0]
+        body_start = offset + 8
+        if chunk_id == b"fmt ":
+            fmt_body = bytes(view[body_start:body_start + chunk_size])
+        elif chunk_id == b"data":
+            if fmt_body is None:
+                raise ValueError("WAV data chunk appears before fmt chunk")
+            body_end = body_start + chunk_size
+            if chunk_size in (0, 0xFFFFFFFF) or body_end > len(view):
+                body_end = len(view)
+            return fmt_body, view[body_start:body_end]
+        # Chunks are word aligned
+        offset = body_start + chunk_size + (chunk_size & 1)
+
+    raise ValueError("No data chunk found in WAV buffer")
+
+
+class WavAssembler:
+    """
+    Streams the PCM payloads of several WAV buffers into a single WAV file.
+
+    The header is written once with placeholder sizes and patched on close, so
+    the output never has to be decoded or held in memory as a whole.
+    """
+
+    HEADER_SIZE_OFFSET = 4
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.fmt_body: Optional[bytes] = None
+        self.data_bytes = 0
+        self.chunk_sizes = []
+        self._data_size_offset = 0
+        self._file = open(output_path, "wb")
+
+    def __enter__(self) -> "WavAssembler":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def append(self, wav_data: bytes) -> int:
+        """
+        Append the PCM payload of one WAV buffer.
+
+        Args:
+            wav_data: Complete WAV file contents for one chunk
+
+        Returns:
+            int: Number of PCM bytes written
+        """
+        fmt_body, pcm = parse_wav(wav_data)
+        if self.fmt_body is None:
+            self.fmt_body = fmt_body
+            self._write_header()
+        elif fmt_body != self.fmt_body:
+            raise ValueError("WAV chunk format does not match the first chunk")
+
+        self._file.write(pcm)
+        self.data_bytes += len(pcm)
+        self.chunk_sizes.append(len(pcm))
+        return len(pcm)
+
+    def _write_header(self) -> None:
+        self._file.write(b"RIFF\x00\x00\x00\x00WAVE")
+        self._file.write(b"fmt " + struct.pack("<I", len(self.fmt_body)) + self.fmt_body)
+        if len(self.fmt_body) & 1:
+            self._file.write(b"\x00")
+        self._file.write(b"data")
+        self._data_size_offset = self._file.tell()
+        self._file.write(b"\x00\x00\x00\x00")
+
+    @property
+    def channels(self) -> int:
+        return struct.unpack_from("<H", self.fmt_body, 2)[0] if self.fmt_body else 0
+
+    @property
+    def sample_width(self) -> int:
+        return struct.unpack_from("<H", self.fmt_body, 14)[0] // 8 if self.fmt_body else 0
+
+    @property
+    def sample_rate(self) -> int:
+        return struct.unpack_from("<I", self.fmt_body, 4)[0] if self.fmt_body else 0
+
+    @property
+    def byte_rate(self) -> int:
+        return struct.unpack_from("<I", self.fmt_body, 8)[0] if self.fmt_body else 0
+
+    def chunk_durations(self) -> List[float]:
+        """Duration in seconds of each appended chunk, in order."""
+        return [size / self.byte_rate if self.byte_rate else 0.0 for size in self.chunk_sizes]
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds of the audio written so far."""
+        return self.data_bytes / self.byte_rate if self.byte_rate else 0.0
+
+    def close(self) -> str:
+        """
+        Patch the RIFF and data sizes and close the file.
+
+        Returns:
+            str: Path of the assembled WAV file
+        """
+        if self._file.closed:
+            return self.output_path
+        if self.fmt_body is None:
+            self.abort()
+            raise ValueError("No audio was appended")
+
+        if self.data_bytes & 1:
+            self._file.write(b"\x00")
+        riff_size = self._file.tell() - 8
+        self._file.seek(self.HEADER_SIZE_OFFSET)
+        self._file.write(struct.pack("<I", riff_size))
+        self._file.seek(self._data_size_offset)
+        self._file.write(struct.pack("<I", self.data_bytes))
+        self._file.close()
+        return self.output_path
+
+    def abort(self) -> None:
+        """Close and delete a partially written output file."""
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self.output_path)
+        except OSError:
+            pass
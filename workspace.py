@@ -0,0 +1,73 @@
+import os
+import time
+import uuid
+import shutil
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE_ROOT = os.getenv("WORKSPACE_DIR", "workspaces")
+# Workspaces that were never cleaned up (crashes, results too large to cache) are swept after this
+WORKSPACE_MAX_AGE_SECONDS = float(os.getenv("WORKSPACE_MAX_AGE_SECONDS", 24 * 3600))
+
+
+class Workspace:
+    """
+    Private directory for the intermediate and output files of one pipeline run.
+
+    Every file a run writes (narration, scene images, video, subtitles) lives under
+    workspaces/<run_id>/, so concurrent runs on one machine can never overwrite
+    each other's artifacts, and everything is removed with a single cleanup().
+    A workspace created with the run ID of a failed run picks up its files and
+    checkpoints; failed runs are kept until sweep_workspaces() finds them stale.
+    """
+
+    def __init__(self, run_id: Optional[str] = None, root: str = WORKSPACE_ROOT):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.root = os.path.abspath(os.path.join(root, self.run_id))
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        """Absolute path of a file inside the workspace."""
+        return os.path.join(self.root, name)
+
+    def subdir(self, name: str) -> str:
+        """Create (if needed) and return a subdirectory of the workspace."""
+        path = self.path(name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def cleanup(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+        logger.debug("Removed workspace %s", self.root)
+
+    def reset(self) -> None:
+        """Discard everything from earlier attempts and start with an empty directory."""
+        self.cleanup()
+        os.makedirs(self.root, exist_ok=True)
+
+
+def sweep_workspaces(root: str = WORKSPACE_ROOT, max_age_seconds: float = WORKSPACE_MAX_AGE_SECONDS) -> int:
+    """
+    Remove workspaces untouched for longer than max_age_seconds.
+
+    Returns:
+        int: Number of workspaces removed
+    """
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    if removed:
+        logger.info("Swept %d stale workspaces from %s", removed, root)
+    return removed